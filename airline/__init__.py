@@ -10,8 +10,10 @@ more informative, and allows for the notion of spans and distributed tracing
 
 But this is a start.
 """
+from collections import namedtuple
 from contextlib import contextmanager
 import functools
+import inspect
 import logging
 import os
 from typing import (
@@ -20,6 +22,7 @@ from typing import (
     Optional,
 )
 
+from .profiler import DEFAULT_INTERVAL, DEFAULT_TOP
 from .threadlocal_client import ThreadLocalClient
 from .version import __version__   # noqa: F401
 
@@ -30,11 +33,25 @@ _ARL = None
 log = logging.getLogger('airline')
 
 
-def init(dataset: str = '', debug=False):
+def init(dataset: str = '', debug=False, transmission=None, redactor=None, resources=False, profile_rate=0.0,
+         profile_interval=DEFAULT_INTERVAL, profile_top=DEFAULT_TOP):
+    """Initialize the library.
+
+    Events are printed to stderr, unless a `transmission` (e.g.
+    `airline.transmission.HTTPTransmission`) is given to send them on.
+    A `redactor` (`airline.redact.Redactor`) removes or hashes fields
+    before they're sent.  With `resources`, cpu time, memory and gc
+    pauses are recorded for each event (see `airline.resources`).
+    `profile_rate` is the fraction of events to run the sampling profiler
+    on, sampling every `profile_interval` seconds and keeping the
+    `profile_top` hottest functions (see `airline.profiler`).
+    """
     global _ARL
 
     if _ARL is None:
-        _ARL = ThreadLocalClient(dataset=dataset, debug=debug)
+        _ARL = ThreadLocalClient(dataset=dataset, debug=debug, transmission=transmission, redactor=redactor,
+                                 resources=resources, profile_rate=profile_rate,
+                                 profile_interval=profile_interval, profile_top=profile_top)
     else:
         log.warning("Library already initialized: client=%r new_dataset=%s", _ARL, dataset)
 
@@ -107,7 +124,9 @@ def done():
     ''' close the airline client, flushing any unsent events. '''
     global _ARL
     if _ARL:
-        _ARL.done()
+        if _ARL._event:
+            _ARL.done()
+        _ARL.close()
 
     _ARL = None
 
@@ -116,8 +135,14 @@ def evented(**extra_context):
     """Decorator for wrapping a generic function in an event.
 
     The event will be sent when the function ends, possibly annotated with
-    any exception raised."""
+    any exception raised.  Coroutine functions are wrapped so the event
+    covers the awaited call, and generators (sync or async) so the event
+    covers the whole iteration."""
     def wrapped(fn):
+        kind = _kind(fn)
+        if kind != _FUNCTION:
+            return _evented_special(fn, kind, extra_context)
+
         @functools.wraps(fn)
         def inner(*args, **kwargs):
             if _ARL:
@@ -139,14 +164,24 @@ def timed(add_count=True, **extra_context):
     The total duration of all calls to the function, and the number
     of calls will be attached as fields to the event.
     Also, additional context can be provided.
+
+    Coroutine functions are timed until the awaited call completes.  For
+    generators (sync or async) only the time spent producing items is
+    counted, and the number of items and the time to the first item are
+    also attached.
     """
     def wrapped(fn):
+        kind = _kind(fn)
+        if kind != _FUNCTION:
+            return _timed_special(fn, kind, add_count, extra_context)
+
+        name = fn.__name__
+        timer_name = f"{name}_duration"
+        count_name = f"{name}_calls"
+
         @functools.wraps(fn)
         def inner(*args, **kwargs):
             if _ARL:
-                name = fn.__name__
-                timer_name = f"{name}_duration"
-                count_name = f"{name}_calls"
                 with _ARL.add_timer_field(timer_name):
                     if add_count:
                         _ARL.add_rollup_field(count_name, 1)
@@ -161,6 +196,200 @@ def timed(add_count=True, **extra_context):
     return wrapped
 
 
+_FUNCTION = 'function'
+_COROUTINE = 'coroutine'
+_GENERATOR = 'generator'
+_ASYNCGEN = 'asyncgen'
+
+_TimedNames = namedtuple('_TimedNames', ['timer', 'count', 'items', 'first_item'])
+
+
+def _kind(fn) -> str:
+    # decorated generators are returned as plain functions which build the
+    # wrapping generator, so look for our own marker as well.
+    if inspect.iscoroutinefunction(fn):
+        return _COROUTINE
+    elif inspect.isasyncgenfunction(fn):
+        return _ASYNCGEN
+    elif inspect.isgeneratorfunction(fn):
+        return _GENERATOR
+    else:
+        return getattr(fn, '_airline_kind', _FUNCTION)
+
+
+def _evented_special(fn, kind, extra_context):
+    if kind == _COROUTINE:
+        @functools.wraps(fn)
+        async def inner(*args, **kwargs):
+            if _ARL:
+                with _event_scope(_ARL, extra_context):
+                    return await fn(*args, **kwargs)
+            else:
+                return await fn(*args, **kwargs)
+    else:
+        wrap_iteration = _evented_generator if kind == _GENERATOR else _evented_asyncgen
+
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            if _ARL:
+                return wrap_iteration(_ARL, fn(*args, **kwargs), extra_context)
+            else:
+                return fn(*args, **kwargs)
+
+    inner._airline_kind = kind
+    return inner
+
+
+def _timed_special(fn, kind, add_count, extra_context):
+    name = fn.__name__
+    names = _TimedNames(f"{name}_duration", f"{name}_calls", f"{name}_items", f"{name}_first_item")
+
+    if kind == _COROUTINE:
+        @functools.wraps(fn)
+        async def inner(*args, **kwargs):
+            if _ARL:
+                with _ARL.add_timer_field(names.timer):
+                    _start_timed(_ARL, names, add_count, extra_context)
+                    return await fn(*args, **kwargs)
+            else:
+                return await fn(*args, **kwargs)
+    else:
+        wrap_iteration = _timed_generator if kind == _GENERATOR else _timed_asyncgen
+
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            if _ARL:
+                return wrap_iteration(_ARL, fn(*args, **kwargs), names, add_count, extra_context)
+            else:
+                return fn(*args, **kwargs)
+
+    inner._airline_kind = kind
+    return inner
+
+
+@contextmanager
+def _event_scope(client, extra_context):
+    with client.evented():
+        if extra_context:
+            client.add_context(extra_context)
+        yield
+
+
+def _start_timed(client, names, add_count, extra_context):
+    if add_count:
+        client.add_rollup_field(names.count, 1)
+    if extra_context:
+        client.add_context(extra_context)
+
+
+def _evented_generator(client, gen, extra_context):
+    # the event is only current while the generator is running, so whatever
+    # consumes it (or other generators interleaved with it) keep their own.
+    event = client.new_event(data=extra_context)
+    with client.recording(event):
+        value, error = None, None
+        while True:
+            try:
+                with client.using(event):
+                    item = _resume(gen, value, error)
+            except StopIteration as stop:
+                return stop.value
+
+            try:
+                value, error = (yield item), None
+            except GeneratorExit:
+                with client.using(event):
+                    gen.close()
+                raise
+            except BaseException as e:
+                value, error = None, e
+
+
+async def _evented_asyncgen(client, agen, extra_context):
+    event = client.new_event(data=extra_context)
+    with client.recording(event):
+        value, error = None, None
+        while True:
+            try:
+                with client.using(event):
+                    item = await _aresume(agen, value, error)
+            except StopAsyncIteration:
+                return
+
+            try:
+                value, error = (yield item), None
+            except GeneratorExit:
+                with client.using(event):
+                    await agen.aclose()
+                raise
+            except BaseException as e:
+                value, error = None, e
+
+
+def _timed_generator(client, gen, names, add_count, extra_context):
+    _start_timed(client, names, add_count, extra_context)
+    value, error, first = None, None, True
+    while True:
+        try:
+            with client.add_timer_field(names.timer):
+                if first:
+                    with client.add_timer_field(names.first_item):
+                        item = _resume(gen, value, error)
+                else:
+                    item = _resume(gen, value, error)
+        except StopIteration as stop:
+            return stop.value
+
+        first = False
+        client.add_rollup_field(names.items, 1)
+        try:
+            value, error = (yield item), None
+        except GeneratorExit:
+            gen.close()
+            raise
+        except BaseException as e:
+            value, error = None, e
+
+
+async def _timed_asyncgen(client, agen, names, add_count, extra_context):
+    _start_timed(client, names, add_count, extra_context)
+    value, error, first = None, None, True
+    while True:
+        try:
+            with client.add_timer_field(names.timer):
+                if first:
+                    with client.add_timer_field(names.first_item):
+                        item = await _aresume(agen, value, error)
+                else:
+                    item = await _aresume(agen, value, error)
+        except StopAsyncIteration:
+            return
+
+        first = False
+        client.add_rollup_field(names.items, 1)
+        try:
+            value, error = (yield item), None
+        except GeneratorExit:
+            await agen.aclose()
+            raise
+        except BaseException as e:
+            value, error = None, e
+
+
+def _resume(gen, value, error):
+    if error is None:
+        return gen.send(value)
+    else:
+        return gen.throw(error)
+
+
+def _aresume(agen, value, error):
+    if error is None:
+        return agen.asend(value)
+    else:
+        return agen.athrow(error)
+
+
 def attach_exception(err: Optional[BaseException] = None, prefix: str = 'exception'):
     """
     Attach an exception and traceback to the current event with the given prefix
@@ -0,0 +1,179 @@
+"""
+Instrumentation for asyncio event loops.
+
+```
+async def main():
+    airline.aio.install()
+    await serve()
+```
+
+Once installed on a loop:
+
+- the loop's lag (how late a callback scheduled every `interval` seconds
+  actually runs) is sampled, and every event open on the loop's thread when
+  a sample is taken gets `asyncio.loop_lag.max_ms`, `asyncio.loop_lag.avg_ms`
+  and `asyncio.loop_lag.samples`.  Events shorter than the interval may not
+  see a sample.
+- tasks created by an event's code are counted on that event, as
+  `rollup.asyncio.tasks_created`, and when they finish as
+  `rollup.asyncio.tasks_completed` (or `rollup.asyncio.tasks_cancelled`).
+  Tasks which finish after the event has been sent aren't counted as
+  completed.
+
+`install()` must be called from the loop's thread, e.g. from a coroutine.
+
+`timer()` times a block containing awaits, like `airline.timer()`, and
+works with either `async with` or `with`.
+"""
+import asyncio
+import functools
+import threading
+from typing import (
+    Any,
+    Dict,
+    Optional,
+)
+import weakref
+
+import airline
+
+
+DEFAULT_INTERVAL = 0.05
+
+
+class _LagStats:
+    __slots__ = ('samples', 'total', 'max')
+
+    def __init__(self):
+        self.samples = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, lag: float):
+        self.samples += 1
+        self.total += lag
+        if lag > self.max:
+            self.max = lag
+
+    def fields(self) -> Dict[str, Any]:
+        return {
+            'asyncio.loop_lag.max_ms': round(self.max * 1000, 3),
+            'asyncio.loop_lag.avg_ms': round(self.total / self.samples * 1000, 3),
+            'asyncio.loop_lag.samples': self.samples,
+        }
+
+
+class LoopMonitor:
+    def __init__(self, loop: asyncio.AbstractEventLoop, interval: float = DEFAULT_INTERVAL):
+        self.loop = loop
+        self.interval = interval
+        self.lag = _LagStats()
+        self._events: 'weakref.WeakKeyDictionary[Any, _LagStats]' = weakref.WeakKeyDictionary()
+        self._handle: Optional[asyncio.Handle] = None
+        self._expected = 0.0
+        self._previous_factory = None
+        self._thread_id: Optional[int] = None
+
+    def start(self) -> 'LoopMonitor':
+        self._thread_id = threading.get_ident()
+        self._previous_factory = self.loop.get_task_factory()
+        self.loop.set_task_factory(self._task_factory)
+        self._schedule()
+        return self
+
+    def stop(self):
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+            self.loop.set_task_factory(self._previous_factory)
+
+    def _schedule(self):
+        self._expected = self.loop.time() + self.interval
+        self._handle = self.loop.call_later(self.interval, self._tick)
+
+    def _tick(self):
+        self.record(max(0.0, self.loop.time() - self._expected))
+        self._schedule()
+
+    def record(self, lag: float):
+        '''record a lag sample, on the monitor and every event open on the loop's thread'''
+        self.lag.add(lag)
+
+        client = airline._ARL
+        if not client:
+            return
+
+        for event in client.active_events(self._thread_id):
+            stats = self._events.get(event)
+            if stats is None:
+                stats = self._events[event] = _LagStats()
+            stats.add(lag)
+            event.add(stats.fields())
+
+    def _task_factory(self, loop, coro, **kwargs):
+        if self._previous_factory is None:
+            task = asyncio.Task(coro, loop=loop, **kwargs)
+        else:
+            task = self._previous_factory(loop, coro, **kwargs)
+
+        event = _current_event()
+        if event is not None:
+            event.add_rollup_field('asyncio.tasks_created', 1)
+            task.add_done_callback(functools.partial(_task_done, event))
+        return task
+
+
+def _task_done(event, task: asyncio.Task):
+    client = airline._ARL
+    if not client or not client.is_active(event):
+        # the event has already been sent
+        return
+
+    if task.cancelled():
+        event.add_rollup_field('asyncio.tasks_cancelled', 1)
+    else:
+        event.add_rollup_field('asyncio.tasks_completed', 1)
+
+
+def _current_event():
+    client = airline._ARL
+    return client._event if client else None
+
+
+def install(loop: Optional[asyncio.AbstractEventLoop] = None, interval: float = DEFAULT_INTERVAL) -> LoopMonitor:
+    '''start monitoring `loop` (by default, the current loop)'''
+    if loop is None:
+        loop = asyncio.get_event_loop()
+    return LoopMonitor(loop, interval).start()
+
+
+class timer:
+    """Time a block, which may await, and add it to the event like `airline.timer()`.
+
+    ```
+    async with airline.aio.timer('database'):
+        await fetch()
+    ```
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._timer = None
+
+    def __enter__(self):
+        if airline._ARL:
+            self._timer = airline._ARL.add_timer_field(self.name)
+            self._timer.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._timer is not None:
+            timer, self._timer = self._timer, None
+            return timer.__exit__(*exc_info)
+        return False
+
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, *exc_info):
+        return self.__exit__(*exc_info)
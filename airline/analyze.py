@@ -0,0 +1,359 @@
+"""
+Summarise airline event logs.
+
+Reads newline-delimited airline events from one or more files (optionally
+gzipped), groups them by a field and reports counts, sums and quantiles of
+`duration_ms` and any `timers.*_ms` fields.
+
+```
+airline -g status -g app.function_name events.log.gz
+```
+
+Lines are parsed in parallel across processes.  Plain files are memory
+mapped and split into byte ranges, gzipped files are streamed in blocks of
+lines.  Quantiles come from a log-bucketed sketch, so memory use depends on
+the number of groups and not on the number of events.
+"""
+import argparse
+from collections import defaultdict
+import gzip
+import json
+import math
+import mmap
+import multiprocessing
+import os
+import sys
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+
+DEFAULT_QUANTILES = (0.5, 0.99)
+RELATIVE_ACCURACY = 0.01
+CHUNK_BYTES = 16 * 1024 * 1024
+CHUNK_LINES = 10000
+
+Group = Tuple[Any, ...]
+
+
+class Summary:
+    '''Count, sum and approximate quantiles of a stream of numbers.
+
+    Positive values are counted in buckets whose bounds grow geometrically,
+    so any quantile is within `relative_accuracy` of the true value.
+    Summaries can be merged, which is how the results of each process are
+    combined.
+    '''
+
+    def __init__(self, relative_accuracy: float = RELATIVE_ACCURACY):
+        self.relative_accuracy = relative_accuracy
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self._zeros = 0
+        self._buckets: Dict[int, int] = defaultdict(int)
+
+    def add(self, value: float):
+        self.count += 1
+        self.sum += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+        if value > 0:
+            self._buckets[math.ceil(math.log(value) / self._log_gamma)] += 1
+        else:
+            self._zeros += 1
+
+    def merge(self, other: 'Summary'):
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._zeros += other._zeros
+        for index, count in other._buckets.items():
+            self._buckets[index] += count
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.count:
+            return None
+
+        rank = q * (self.count - 1)
+        seen = self._zeros
+        if rank < seen:
+            return min(max(self.min, 0.0), self.max)
+
+        for index in sorted(self._buckets):
+            seen += self._buckets[index]
+            if rank < seen:
+                value = 2 * self._gamma ** index / (self._gamma + 1)
+                return min(max(value, self.min), self.max)
+
+        return self.max
+
+
+class Aggregate:
+    '''Summaries of each metric, for each group.'''
+
+    def __init__(self, group_by: Sequence[str]):
+        self.group_by = tuple(group_by)
+        self.groups: Dict[Group, Dict[str, Summary]] = {}
+        self.events = 0
+        self.skipped = 0
+
+    def add_line(self, line: bytes):
+        line = line.strip()
+        if not line:
+            return
+
+        try:
+            data = json.loads(line)['data']
+        except (ValueError, KeyError, TypeError):
+            self.skipped += 1
+            return
+
+        self.add(data)
+
+    def add(self, data: Dict[str, Any]):
+        self.events += 1
+        group = tuple(_group_value(_lookup(data, path)) for path in self.group_by)
+        metrics = self.groups.get(group)
+        if metrics is None:
+            metrics = self.groups[group] = {}
+
+        for name, value in _metrics(data):
+            summary = metrics.get(name)
+            if summary is None:
+                summary = metrics[name] = Summary()
+            summary.add(value)
+
+    def merge(self, other: 'Aggregate'):
+        self.events += other.events
+        self.skipped += other.skipped
+        for group, metrics in other.groups.items():
+            mine = self.groups.setdefault(group, {})
+            for name, summary in metrics.items():
+                if name in mine:
+                    mine[name].merge(summary)
+                else:
+                    mine[name] = summary
+
+    def rows(self, quantiles: Sequence[float] = DEFAULT_QUANTILES) -> List[Dict[str, Any]]:
+        rows = []
+        for group in sorted(self.groups, key=_sort_key):
+            metrics = self.groups[group]
+            for name in sorted(metrics):
+                summary = metrics[name]
+                row = dict(zip(self.group_by, group))
+                row.update({
+                    'metric': name,
+                    'count': summary.count,
+                    'sum': round(summary.sum, 3),
+                })
+                for q in quantiles:
+                    row[_quantile_name(q)] = _round(summary.quantile(q))
+                rows.append(row)
+        return rows
+
+
+def _lookup(data: Dict[str, Any], path: str):
+    value: Any = data
+    for key in path.split('.'):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def _group_value(value):
+    '''lists and dicts can't be dict keys, so group by their JSON instead'''
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, sort_keys=True)
+    return value
+
+
+def _metrics(data: Dict[str, Any]) -> Iterable[Tuple[str, float]]:
+    duration = data.get('duration_ms')
+    if _is_number(duration):
+        yield 'duration_ms', duration
+
+    yield from _numbers(data.get('timers'), 'timers')
+
+
+def _numbers(value, path: str) -> Iterable[Tuple[str, float]]:
+    '''numbers anywhere under `value`, named by their dotted path
+
+    dots_to_deep nests timer names containing dots, e.g. `db.query` is sent
+    as `{"timers": {"db": {"query_ms": ...}}}`.
+    '''
+    if isinstance(value, dict):
+        for name, child in value.items():
+            yield from _numbers(child, path + '.' + name)
+    elif _is_number(value):
+        yield path, value
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _sort_key(group: Group):
+    return tuple((v is None, str(v)) for v in group)
+
+
+def _quantile_name(q: float) -> str:
+    return 'p' + ('%g' % (q * 100)).replace('.', '_')
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return None if value is None else round(value, 3)
+
+
+def _is_gzip(path: str) -> bool:
+    with open(path, 'rb') as f:
+        return f.read(2) == b'\x1f\x8b'
+
+
+def _byte_ranges(path: str, chunk_bytes: int) -> List[Tuple[int, int]]:
+    '''Split a file into ranges of roughly chunk_bytes which end on a newline.'''
+    size = os.path.getsize(path)
+    if size == 0:
+        return []
+
+    ranges = []
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        start = 0
+        while start < size:
+            end = mm.find(b'\n', min(start + chunk_bytes, size - 1))
+            end = size if end == -1 else end + 1
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def _aggregate_range(args) -> Aggregate:
+    path, start, end, group_by = args
+    agg = Aggregate(group_by)
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        position = start
+        while position < end:
+            newline = mm.find(b'\n', position, end)
+            stop = end if newline == -1 else newline
+            agg.add_line(mm[position:stop])
+            position = stop + 1
+    return agg
+
+
+def _aggregate_lines(args) -> Aggregate:
+    lines, group_by = args
+    agg = Aggregate(group_by)
+    for line in lines:
+        agg.add_line(line)
+    return agg
+
+
+def _line_blocks(path: str, chunk_lines: int) -> Iterable[List[bytes]]:
+    with gzip.open(path, 'rb') as f:
+        block = []
+        for line in f:
+            block.append(line)
+            if len(block) >= chunk_lines:
+                yield block
+                block = []
+        if block:
+            yield block
+
+
+def _tasks(paths: Sequence[str], group_by: Sequence[str], chunk_bytes: int, chunk_lines: int):
+    for path in paths:
+        if _is_gzip(path):
+            for block in _line_blocks(path, chunk_lines):
+                yield _aggregate_lines, (block, group_by)
+        else:
+            for start, end in _byte_ranges(path, chunk_bytes):
+                yield _aggregate_range, (path, start, end, group_by)
+
+
+def _run_task(task):
+    fn, args = task
+    return fn(args)
+
+
+def analyze(paths: Sequence[str], group_by: Sequence[str] = ('status',), jobs: Optional[int] = None,
+            chunk_bytes: int = CHUNK_BYTES, chunk_lines: int = CHUNK_LINES) -> Aggregate:
+    '''Aggregate the events in `paths`, using `jobs` processes (default: one per cpu).'''
+    result = Aggregate(group_by)
+    tasks = _tasks(paths, group_by, chunk_bytes, chunk_lines)
+
+    if jobs == 1:
+        for task in tasks:
+            result.merge(_run_task(task))
+        return result
+
+    with multiprocessing.Pool(jobs) as pool:
+        for partial in pool.imap_unordered(_run_task, tasks):
+            result.merge(partial)
+    return result
+
+
+def format_table(rows: List[Dict[str, Any]]) -> str:
+    if not rows:
+        return ''
+
+    columns = list(rows[0])
+    for row in rows[1:]:
+        for column in row:
+            if column not in columns:
+                columns.append(column)
+
+    cells = [[_cell(row.get(column)) for column in columns] for row in rows]
+    widths = [max(len(column), *(len(r[i]) for r in cells)) for i, column in enumerate(columns)]
+    lines = ['  '.join(c.ljust(w) for c, w in zip(columns, widths)).rstrip()]
+    for r in cells:
+        lines.append('  '.join(c.ljust(w) for c, w in zip(r, widths)).rstrip())
+    return '\n'.join(lines)
+
+
+def _cell(value) -> str:
+    return '-' if value is None else str(value)
+
+
+def _parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='airline', description='Summarise airline event logs.')
+    parser.add_argument('files', nargs='+', help='event log files, optionally gzipped')
+    parser.add_argument('-g', '--group-by', action='append', dest='group_by',
+                        help='field to group by, e.g. status or app.function_name (repeatable, default: status)')
+    parser.add_argument('-q', '--quantile', action='append', type=float, dest='quantiles',
+                        help='quantile to report, between 0 and 1 (repeatable, default: 0.5 and 0.99)')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='number of processes (default: one per cpu)')
+    parser.add_argument('--json', action='store_true', help='print JSON instead of a table')
+    return parser
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    args = _parser().parse_args(argv)
+    group_by = args.group_by or ['status']
+    quantiles = args.quantiles or DEFAULT_QUANTILES
+
+    agg = analyze(args.files, group_by=group_by, jobs=args.jobs)
+    rows = agg.rows(quantiles)
+
+    if args.json:
+        print(json.dumps({'events': agg.events, 'skipped': agg.skipped, 'rows': rows}, indent=2))
+    else:
+        print(format_table(rows))
+        print(f"\n{agg.events} events, {agg.skipped} lines skipped", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -6,15 +6,19 @@ import time
 import random
 
 import airline
+from airline.heartbeat import Heartbeat
 
 
-def airline_wrapper(_handler=None, *, env_vars=None, add_role_info=True):
+def airline_wrapper(_handler=None, *, env_vars=None, add_role_info=True, heartbeat=None):
     '''airline decorator for a function in a AWS Batch job
     ```
     @airline_wrapper
     def my_handler(event, context):
         # ...
     ```
+
+    If `heartbeat` is a number of seconds, a snapshot of the event is also
+    sent that often while the job runs.
     '''
 
     def decorator_airline(handler):
@@ -42,6 +46,9 @@ def airline_wrapper(_handler=None, *, env_vars=None, add_role_info=True):
                 if add_role_info:
                     _add_role_info()
 
+                if heartbeat:
+                    return _with_heartbeat(heartbeat, handler, *args, **kwargs)
+
                 resp = handler(*args, **kwargs)
 
                 return resp
@@ -53,6 +60,15 @@ def airline_wrapper(_handler=None, *, env_vars=None, add_role_info=True):
         return decorator_airline(_handler)
 
 
+def _with_heartbeat(interval, handler, *args, **kwargs):
+    event = airline._ARL._event
+    beat = Heartbeat(airline._ARL, event, interval, start=event.start_time).start()
+    try:
+        return handler(*args, **kwargs)
+    finally:
+        beat.stop()
+
+
 def _add_role_info():
     uri = os.getenv("AWS_CONTAINER_CREDENTIALS_RELATIVE_URI")
     if not uri:
@@ -1,4 +1,6 @@
 import functools
+import math
+import time
 
 import airline
 
@@ -30,12 +32,7 @@ def airline_wrapper(_handler=None, *, add_event=False, add_response=False):
             try:
 
                 with airline._ARL.evented():
-                    airline.add_context({
-                        "app.function_name": getattr(context, 'function_name', ""),
-                        "app.function_version": getattr(context, 'function_version', ""),
-                        "app.request_id": getattr(context, 'aws_request_id', ""),
-                        "meta.cold_start": COLD_START,
-                    })
+                    _add_invocation_context(context)
 
                     if add_event:
                         airline.add_context_field("app.event", event)
@@ -49,6 +46,10 @@ def airline_wrapper(_handler=None, *, add_event=False, add_response=False):
             finally:
                 # This remains false for the lifetime of the module
                 COLD_START = False
+                # the process may be frozen until the next invocation, so
+                # don't leave events queued in the background
+                if airline._ARL:
+                    airline._ARL.flush()
 
         return _airline_wrapper
 
@@ -56,3 +57,174 @@ def airline_wrapper(_handler=None, *, add_event=False, add_response=False):
         return decorator_airline
     else:
         return decorator_airline(_handler)
+
+
+def batch_airline_wrapper(_handler=None, *, add_record=False, partial_failures=False):
+    '''airline decorator for Lambda functions consuming a batch of records,
+    e.g. from SQS, Kinesis or DynamoDB streams.  Expects a handler for a single
+    record, with the signature:
+    `def handler(record, context)`
+
+    One event is emitted for each record, carrying the invocation context and
+    `batch.id`/`batch.index`, plus a summary event for the whole batch with
+    counts per status and quantiles of the record durations.  The record
+    events are written together at the end of the invocation.
+
+    If `partial_failures` is set, records which raise are reported back to
+    Lambda as `batchItemFailures` instead of failing the whole batch.
+
+    Example use:
+    ```
+    @batch_airline_wrapper(partial_failures=True)
+    def my_handler(record, context):
+        # ...
+    ```
+    '''
+
+    def decorator_airline(handler):
+        @functools.wraps(handler)
+        def _airline_wrapper(event, context):
+            global COLD_START
+
+            records = event.get('Records', [])
+
+            # don't blow up the world if the airline has not been initialized
+            if not airline._ARL:
+                return _handle_records(handler, records, context, partial_failures)
+
+            try:
+                with airline._ARL.evented():
+                    _add_invocation_context(context)
+                    return _handle_batch(airline._ARL, handler, records, context, add_record, partial_failures)
+            finally:
+                # This remains false for the lifetime of the module
+                COLD_START = False
+                # the process may be frozen until the next invocation, so
+                # don't leave events queued in the background
+                if airline._ARL:
+                    airline._ARL.flush()
+
+        return _airline_wrapper
+
+    if _handler is None:
+        return decorator_airline
+    else:
+        return decorator_airline(_handler)
+
+
+def _add_invocation_context(context):
+    airline.add_context({
+        "app.function_name": getattr(context, 'function_name', ""),
+        "app.function_version": getattr(context, 'function_version', ""),
+        "app.request_id": getattr(context, 'aws_request_id', ""),
+        "meta.cold_start": COLD_START,
+    })
+
+
+def _handle_records(handler, records, context, partial_failures):
+    failures = []
+    for record in records:
+        try:
+            handler(record, context)
+        except Exception:
+            if not partial_failures:
+                raise
+            failures.append({"itemIdentifier": _record_id(record)})
+
+    if partial_failures:
+        return {"batchItemFailures": failures}
+
+
+def _handle_batch(client, handler, records, context, add_record, partial_failures):
+    parent = client._event
+    static = parent.fields()
+    batch_id = getattr(context, 'aws_request_id', "")
+    children = []
+    failures = []
+
+    try:
+        for index, record in enumerate(records):
+            child = client.new_event(data=static)
+            child.add({
+                "batch.id": batch_id,
+                "batch.index": index,
+                "app.record_id": _record_id(record),
+                "app.event_source": record.get('eventSource') or record.get('EventSource'),
+            })
+            if add_record:
+                child.add_field("app.record", record)
+            children.append(child)
+
+            try:
+                _handle_record(client, child, handler, record, context)
+            except Exception:
+                if not partial_failures:
+                    raise
+                failures.append({"itemIdentifier": _record_id(record)})
+    finally:
+        parent.add(_summarise(children))
+        parent.add_field("batch.id", batch_id)
+        parent.add_field("batch.size", len(records))
+        client.send_batch(children)
+
+    if partial_failures:
+        parent.add_field("batch.failures", len(failures))
+        return {"batchItemFailures": failures}
+
+
+def _handle_record(client, child, handler, record, context):
+    start = time.perf_counter()
+    with client.using(child):
+        try:
+            handler(record, context)
+            if child.get_field('status') is None:
+                child.add_field('status', 'SUCCESS')
+        except Exception as e:
+            child.add_field('status', 'ERROR')
+            child.attach_exception(e)
+            raise
+        finally:
+            child.merge_shards()
+            duration = (time.perf_counter() - start) * 1000
+            child.add_field('duration_ms', round(duration, 3))
+
+
+def _record_id(record):
+    if 'messageId' in record:
+        return record['messageId']
+    elif 'kinesis' in record:
+        return record['kinesis'].get('sequenceNumber')
+    elif 'dynamodb' in record:
+        return record['dynamodb'].get('SequenceNumber')
+    else:
+        return None
+
+
+QUANTILES = (('p50', 0.5), ('p90', 0.9), ('p99', 0.99))
+
+
+def _summarise(children):
+    summary = {}
+    durations = []
+    for child in children:
+        # status and duration are plain fields, so skip building the full fields()
+        status = child.get_field('status', 'UNKNOWN')
+        key = f"batch.status.{status}"
+        summary[key] = summary.get(key, 0) + 1
+        duration = child.get_field('duration_ms')
+        if duration is not None:
+            durations.append(duration)
+
+    if durations:
+        durations.sort()
+        for name, q in QUANTILES:
+            summary[f"batch.duration_ms.{name}"] = _quantile(durations, q)
+        summary["batch.duration_ms.max"] = durations[-1]
+
+    return summary
+
+
+def _quantile(ordered, q):
+    '''nearest-rank quantile of an already sorted list'''
+    index = max(0, math.ceil(q * len(ordered)) - 1)
+    return ordered[index]
@@ -1,16 +1,21 @@
 from contextlib import contextmanager
 import json
 import logging
+import random
+import threading
 import time
 import sys
 from typing import (
     Optional,
     Dict,
     Any,
+    List,
     Union,
 )
 
 from .event import Event
+from .profiler import Sampler, DEFAULT_INTERVAL, DEFAULT_TOP
+from .resources import Usage, install_gc_callback
 from .version import __version__
 
 
@@ -18,9 +23,20 @@ log = logging.getLogger('airline')
 
 
 class Client():
-    def __init__(self, dataset: str, debug=False):
+    def __init__(self, dataset: str, debug=False, transmission=None, redactor=None, resources=False,
+                 profile_rate=0.0, profile_interval=DEFAULT_INTERVAL, profile_top=DEFAULT_TOP):
         self.dataset = dataset
         self.debug = debug
+        self.transmission = transmission
+        self.redactor = redactor
+        self.resources = resources
+        self.profile_rate = profile_rate
+        self.profile_interval = profile_interval
+        self.profile_top = profile_top
+        self._event: Optional[Event] = None
+        self._active: Dict[Event, int] = {}
+        if resources:
+            install_gc_callback()
 
     def add_context_field(self, name: str, value: Any):
         if self._event:
@@ -56,12 +72,28 @@ class Client():
             self.log("No event found")
 
     @contextmanager
-    def evented(self):
-        if self._event:
-            self.log("Event already created")
-        else:
-            event = self.start()
-        start = time.perf_counter()
+    def evented(self, profile: Optional[bool] = None):
+        '''Start a new event, current for the duration of the block, and send it at the end.
+
+        Any event which was already current is restored afterwards.
+        '''
+        event = self.new_event()
+        with self.using(event):
+            with self.recording(event, profile):
+                yield event
+
+    @contextmanager
+    def recording(self, event: Event, profile: Optional[bool] = None):
+        '''Time `event` over the block, annotate it with any exception raised, and send it at the end.
+
+        This doesn't make `event` current, so the block can span code which
+        switches between events, like a paused generator.
+        '''
+        if self.resources:
+            usage = Usage.now()
+        sampler = self._start_sampler(profile)
+        start = event.start_time = time.perf_counter()
+        self._active[event] = threading.get_ident()
         try:
             yield
         except Exception as e:
@@ -72,7 +104,38 @@ class Client():
             done = time.perf_counter()
             duration = (done - start) * 1000
             event.add_field('duration_ms', round(duration, 3))
-            self.done()
+            if self.resources:
+                event.add(Usage.now().fields_since(usage))
+            if sampler:
+                sampler.stop()
+                event.add(sampler.fields())
+            self._active.pop(event, None)
+            self.finish(event)
+
+    def active_events(self, thread_id: Optional[int] = None) -> List[Event]:
+        '''the events currently being recorded, optionally only those started on the given thread'''
+        return [ev for ev, ident in list(self._active.items()) if thread_id is None or ident == thread_id]
+
+    def is_active(self, event: Event) -> bool:
+        return event in self._active
+
+    def _start_sampler(self, profile: Optional[bool]) -> Optional[Sampler]:
+        '''start profiling this thread, if asked to or this event is picked by the profile rate'''
+        if profile is None:
+            profile = self.profile_rate > 0 and random.random() < self.profile_rate
+        if profile:
+            return Sampler(interval=self.profile_interval, top=self.profile_top).start()
+        return None
+
+    @contextmanager
+    def using(self, event: Event):
+        '''Make `event` the current event for the duration of the block.'''
+        previous = self._event
+        self._event = event
+        try:
+            yield event
+        finally:
+            self._event = previous
 
     def start(self, event=None):
         if event is None:
@@ -82,14 +145,43 @@ class Client():
         return event
 
     def done(self):
-        self.send(self._event)
+        self.finish(self._event)
         self._event = None
 
+    def finish(self, event: Event):
+        '''merge in any thread shards, and send the event'''
+        event.merge_shards()
+        self.send(event)
+
     def new_event(self, data={}):
-        return Event(data=data, client=self)
+        return Event(data=data, client=self, resources=self.resources)
 
     def send(self, ev: Event):
-        '''send accepts an event and writes it to the configured output file'''
+        '''send accepts an event and passes it to the transmission, or writes it to the configured output file'''
+        if self.transmission:
+            self.transmission.send(self._serialize(ev))
+        else:
+            print(self._serialize(ev) + "\n", file=sys.stderr)
+
+    def send_batch(self, events: List[Event]):
+        '''send_batch writes all the given events to the output file in one write'''
+        if self.transmission:
+            for ev in events:
+                self.transmission.send(self._serialize(ev))
+        elif events:
+            sys.stderr.write("".join(self._serialize(ev) + "\n\n" for ev in events))
+
+    def flush(self):
+        '''wait for the transmission, if there is one, to send everything queued so far'''
+        if self.transmission:
+            self.transmission.flush()
+
+    def close(self):
+        '''flush and close the transmission, if there is one'''
+        if self.transmission:
+            self.transmission.close()
+
+    def _serialize(self, ev: Event) -> str:
         event_time = ev.created_at.isoformat()
         if ev.created_at.tzinfo is None:
             event_time += "Z"
@@ -98,24 +190,25 @@ class Client():
             "time": event_time,
             "dataset": ev.dataset,
             "client": "airline/" + __version__,
-            "data": dots_to_deep(ev.fields()),
+            "data": dots_to_deep(ev.fields(), self.redactor),
         }
         if self.debug:
             indent: Optional[int] = 2
         else:
             indent = None
 
-        print(json.dumps(payload, indent=indent, default=_json_default_handler) + "\n", file=sys.stderr)
+        return json.dumps(payload, indent=indent, default=_json_default_handler)
 
     def log(self, message, *args):
         if self.debug:
             log.debug(message, *args)
 
     def __repr__(self):
-        return "{cls}(dataset={dataset!r}, debug={debug!r})".format(
+        return "{cls}(dataset={dataset!r}, debug={debug!r}, transmission={transmission!r})".format(
             cls=self.__class__.__name__,
             dataset=self.dataset,
             debug=self.debug,
+            transmission=self.transmission,
         )
 
 
@@ -128,9 +221,14 @@ def _json_default_handler(obj):
         return repr(obj)
 
 
-def dots_to_deep(dictionary):
+def dots_to_deep(dictionary, redactor=None):
     new_dict = {}
     for k, v in dictionary.items():
+        if redactor:
+            keep, v = redactor.apply(k, v)
+            if not keep:
+                continue
+
         *keys, key = k.split('.')
         d = new_dict
         for kk in keys:
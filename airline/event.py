@@ -2,16 +2,19 @@ import datetime as dt
 from collections import defaultdict
 from contextlib import contextmanager
 import json
+import threading
 import time
 from typing import (
     Dict,
     Any,
     Union,
+    List,
     Optional,
     DefaultDict
 )
 
 from .format_exception import format_exception
+from .resources import cpu_times, PREFIX as RESOURCES_PREFIX
 
 Numeric = Union[int, float]
 TIMER_PREFIX = 'timers.'
@@ -19,18 +22,26 @@ ROLLUP_PREFIX = 'rollup.'
 
 
 class Event:
-    def __init__(self, data: Dict[str, Any] = {}, created_at=dt.datetime.utcnow(), client=None):
+    def __init__(self, data: Dict[str, Any] = {}, created_at=dt.datetime.utcnow(), client=None, resources=False):
         self._data: Dict[str, Any] = {}
         self._client = client
+        self._resources = resources
 
         if client:
             self.dataset = client.dataset
         else:
             self.dataset = ''
         self.created_at = created_at
+        # perf_counter() when the client started recording the event
+        self.start_time: Optional[float] = None
         self.add(data=data)
         self._rollup_fields: DefaultDict[str, Numeric] = defaultdict(int)
         self._timer_fields: DefaultDict[str, float] = defaultdict(float)
+        self._timer_cpu: DefaultDict[str, float] = defaultdict(float)
+        self._timer_thread_cpu: DefaultDict[str, float] = defaultdict(float)
+        # perf_counter() start times of the timers which haven't finished yet
+        self._open_timers: Dict[str, List[float]] = {}
+        self._shards: Dict[int, 'Event'] = {}
 
     def add(self, data: Dict[str, Any]):
         self._data.update(data)
@@ -38,17 +49,82 @@ class Event:
     def add_field(self, name: str, value: Any):
         self._data[name] = value
 
+    def get_field(self, name: str, default: Any = None) -> Any:
+        '''the value of a field added with `add_field()` or `add()`'''
+        return self._data.get(name, default)
+
     def add_rollup_field(self, name: str, value: Numeric):
         self._rollup_fields[name] += value
 
     @contextmanager
     def add_timer_field(self, name: str):
+        resources = self._resources
         try:
+            if resources:
+                cpu, thread_cpu = cpu_times()
             start = time.perf_counter()
+            starts = self._open_timers.setdefault(name, [])
+            starts.append(start)
             yield
         finally:
             done = time.perf_counter()
             self._timer_fields[name] += (done - start) * 1000
+            starts.remove(start)
+            if resources:
+                cpu_done, thread_cpu_done = cpu_times()
+                self._timer_cpu[name] += (cpu_done - cpu) * 1000
+                self._timer_thread_cpu[name] += (thread_cpu_done - thread_cpu) * 1000
+
+    def shard(self) -> 'Event':
+        '''Return the calling thread's shard of this event, creating it if needed.
+
+        Each thread writes to its own shard, so no locking is needed while
+        recording fields. Shards are folded back in by `merge_shards()`.
+        '''
+        ident = threading.get_ident()
+        shard = self._shards.get(ident)
+        if shard is None:
+            shard = self._shards.setdefault(ident, Event(created_at=self.created_at, resources=self._resources))
+        return shard
+
+    def merge_shards(self):
+        '''Fold all thread shards into this event.'''
+        # a task which outlives the event may still be writing to its shard,
+        # so copy each dict (atomically, as in snapshot()) before iterating
+        shards, self._shards = self._shards, {}
+        for shard in shards.values():
+            shard.merge_shards()
+            self._data.update(shard._data.copy())
+            for name, value in shard._rollup_fields.copy().items():
+                self._rollup_fields[name] += value
+            for name, value in shard._timer_fields.copy().items():
+                self._timer_fields[name] += value
+            for name, value in shard._timer_cpu.copy().items():
+                self._timer_cpu[name] += value
+            for name, value in shard._timer_thread_cpu.copy().items():
+                self._timer_thread_cpu[name] += value
+
+    def snapshot(self) -> 'Event':
+        '''Return a copy of the fields recorded so far, including those on thread shards.
+
+        This can be called from another thread while fields are still being
+        recorded.  Each dict is copied in a single call which holds the GIL
+        throughout, so the copy never sees a dict mid-update.  Timers which
+        are still running are included, up to now.
+        '''
+        now = time.perf_counter()
+        snap = Event(data=self._data.copy(), created_at=self.created_at, client=self._client, resources=self._resources)
+        snap._rollup_fields.update(self._rollup_fields.copy())
+        snap._timer_fields.update(self._timer_fields.copy())
+        for name, starts in self._open_timers.copy().items():
+            for start in starts.copy():
+                snap._timer_fields[name] += (now - start) * 1000
+        snap._timer_cpu.update(self._timer_cpu.copy())
+        snap._timer_thread_cpu.update(self._timer_thread_cpu.copy())
+        for shard in list(self._shards.values()):
+            snap._shards[id(shard)] = shard.snapshot()
+        snap.merge_shards()
+        return snap
 
     def attach_exception(self, err: Optional[BaseException] = None, prefix: str = 'exception'):
         self.add(format_exception(err, prefix))
@@ -70,11 +146,19 @@ class Event:
         return {_rollup_name(k): v for k, v in self._rollup_fields.items()}
 
     def fields(self) -> Dict[str, Any]:
-        return {**self._data, **self.rollup_fields(), **self.timer_fields()}
+        return {**self._data, **self.rollup_fields(), **self.timer_fields(), **self.timer_resource_fields()}
 
     def timer_fields(self) -> Dict[str, float]:
         return {_timer_name(k): round(v, 3) for k, v in self._timer_fields.items()}
 
+    def timer_resource_fields(self) -> Dict[str, float]:
+        fields = {}
+        for k, v in self._timer_cpu.items():
+            fields[_timer_resource_name(k, 'cpu_ms')] = round(v, 3)
+        for k, v in self._timer_thread_cpu.items():
+            fields[_timer_resource_name(k, 'thread_cpu_ms')] = round(v, 3)
+        return fields
+
 
 def _rollup_name(name: str):
     if name.startswith(ROLLUP_PREFIX):
@@ -90,3 +174,8 @@ def _timer_name(name: str):
     if not name.endswith('_ms'):
         name = name + '_ms'
     return name
+
+
+def _timer_resource_name(name: str, field: str):
+    base = _timer_name(name)[len(TIMER_PREFIX):-len('_ms')]
+    return f"{RESOURCES_PREFIX}timers.{base}.{field}"
@@ -0,0 +1,35 @@
+"""
+Executors which carry the active event over to their worker threads.
+
+```
+@airline.evented()
+def main(urls):
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        pool.map(fetch, urls)
+```
+
+Any fields, rollups or timers recorded in `fetch` end up on the event
+created for `main`, as long as they're recorded before that event is done.
+"""
+import concurrent.futures
+import functools
+
+import airline
+
+
+class ThreadPoolExecutor(concurrent.futures.ThreadPoolExecutor):
+    def submit(self, fn, *args, **kwargs):
+        client = airline._ARL
+        event = client._event if client else None
+        if event is not None:
+            fn = _bind(client, event, fn)
+        return super(ThreadPoolExecutor, self).submit(fn, *args, **kwargs)
+
+
+def _bind(client, event, fn):
+    @functools.wraps(fn)
+    def inner(*args, **kwargs):
+        with client.bound(event):
+            return fn(*args, **kwargs)
+
+    return inner
@@ -0,0 +1,80 @@
+"""
+Periodic snapshots of an event which is still in progress.
+
+Long running jobs only emit their event when they finish, so a heartbeat
+sends a copy of the event so far every `interval` seconds, with
+`heartbeat.sequence` and `heartbeat.elapsed_ms`, and how much each rollup
+and timer has grown since the previous snapshot under `heartbeat.delta`.
+Timers which are still running count up to the time of the snapshot.
+"""
+import logging
+import threading
+import time
+from typing import (
+    Dict,
+    Optional,
+)
+
+from .event import Event, _rollup_name, _timer_name
+
+
+log = logging.getLogger('airline')
+
+
+class Heartbeat:
+    def __init__(self, client, event: Event, interval: float, start: Optional[float] = None):
+        '''`start` is the perf_counter() time the event started, to measure elapsed time from'''
+        if interval <= 0:
+            raise ValueError("Heartbeat interval must be positive: interval=%r" % (interval,))
+        self.client = client
+        self.event = event
+        self.interval = interval
+        self.sequence = 0
+        self._start = time.perf_counter() if start is None else start
+        self._rollups: Dict[str, float] = {}
+        self._timers: Dict[str, float] = {}
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> 'Heartbeat':
+        self._thread = threading.Thread(target=self._run, name='airline-heartbeat', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                self.beat()
+            except Exception:
+                # keep going, the next snapshot may well succeed
+                log.warning("Failed to send heartbeat: sequence=%d", self.sequence, exc_info=True)
+
+    def beat(self):
+        '''send a snapshot of the event now'''
+        snap = self.event.snapshot()
+        self.sequence += 1
+
+        rollups = dict(snap._rollup_fields)
+        timers = dict(snap._timer_fields)
+        snap.add({
+            'heartbeat.sequence': self.sequence,
+            'heartbeat.elapsed_ms': round((time.perf_counter() - self._start) * 1000, 3),
+        })
+        snap.add({
+            'heartbeat.delta.' + _rollup_name(name): value - self._rollups.get(name, 0)
+            for name, value in rollups.items()
+        })
+        snap.add({
+            'heartbeat.delta.' + _timer_name(name): round(value - self._timers.get(name, 0.0), 3)
+            for name, value in timers.items()
+        })
+        self._rollups = rollups
+        self._timers = timers
+
+        self.client.send(snap)
@@ -0,0 +1,115 @@
+"""
+A sampling profiler for the thread running an event.
+
+Enabled with `airline.init(profile_rate=...)`, a fraction of events (or any
+event started with `Client.evented(profile=True)`) get a watcher thread,
+which looks at the stack of the evented thread every `profile_interval`
+seconds.  The hottest functions are attached to the event:
+
+- `profile.samples`, `profile.interval_ms`
+- `profile.overhead_ms`: time the watcher spent taking samples
+- `profile.self`: functions most often at the top of the stack
+- `profile.total`: functions most often anywhere on the stack
+
+The watcher only exists while a profiled event is active.  Counts are kept
+with the space saving algorithm, so memory is bounded however many
+distinct functions are seen, and the top entries are accurate.
+"""
+import sys
+import threading
+import time
+from typing import (
+    Any,
+    Dict,
+    List,
+    Optional,
+)
+
+
+DEFAULT_INTERVAL = 0.005
+DEFAULT_TOP = 10
+MAX_DEPTH = 128
+
+
+class TopCounter:
+    '''Approximate counts of the most frequent keys, in bounded space.'''
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._counts: Dict[str, int] = {}
+
+    def add(self, key: str):
+        counts = self._counts
+        if key in counts:
+            counts[key] += 1
+        elif len(counts) < self.capacity:
+            counts[key] = 1
+        else:
+            # evict the smallest count; the newcomer may have been it
+            smallest = min(counts, key=counts.__getitem__)
+            counts[key] = counts.pop(smallest) + 1
+
+    def top(self, n: int) -> List[Dict[str, Any]]:
+        ordered = sorted(self._counts.items(), key=lambda kv: (-kv[1], kv[0]))
+        return [{'frame': k, 'samples': v} for k, v in ordered[:n]]
+
+
+class Sampler:
+    def __init__(self, thread_id: Optional[int] = None, interval: float = DEFAULT_INTERVAL, top: int = DEFAULT_TOP):
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.interval = interval
+        self.top = top
+        self.samples = 0
+        self.overhead = 0.0
+        self._self = TopCounter(top * 10)
+        self._total = TopCounter(top * 10)
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> 'Sampler':
+        self._thread = threading.Thread(target=self._run, name='airline-profiler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            start = time.perf_counter()
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.sample(frame)
+            self.overhead += time.perf_counter() - start
+
+    def sample(self, frame):
+        self.samples += 1
+        self._self.add(_frame_name(frame))
+
+        seen = set()
+        depth = 0
+        while frame is not None and depth < MAX_DEPTH:
+            name = _frame_name(frame)
+            if name not in seen:
+                seen.add(name)
+                self._total.add(name)
+            frame = frame.f_back
+            depth += 1
+
+    def fields(self) -> Dict[str, Any]:
+        return {
+            'profile.samples': self.samples,
+            'profile.interval_ms': round(self.interval * 1000, 3),
+            'profile.overhead_ms': round(self.overhead * 1000, 3),
+            'profile.self': self._self.top(self.top),
+            'profile.total': self._total.top(self.top),
+        }
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    module = frame.f_globals.get('__name__', '?')
+    return f"{module}.{code.co_name}:{code.co_firstlineno}"
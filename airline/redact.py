@@ -0,0 +1,157 @@
+"""
+Rules for removing or hashing sensitive fields before events are sent.
+
+```
+airline.init(dataset='my_app', redactor=Redactor(
+    deny=['app.event.headers.Authorization'],
+    hash=['app.event.requestContext.identity.*'],
+))
+```
+
+Rules are dotted field paths, where `*` matches any single key or list
+index, and a number matches that list index.  A rule applies to everything
+below its path, whether the event has the field as `a.b.c` or nests it as a
+dict under `a`.  If any `allow` rules are given,
+only fields under those paths are kept.  When rules overlap, deny wins over
+hash, and hash over allow.
+
+The rules are compiled into a trie once, and applied as the event is nested
+up for serialization, so only the parts of a value which have rules below
+them are copied.
+"""
+import hashlib
+import json
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+)
+
+
+ALLOW = 1
+HASH = 2
+DENY = 3
+
+WILDCARD = '*'
+MAX_CACHED_KEYS = 4096
+
+
+class _Node:
+    __slots__ = ('children', 'action')
+
+    def __init__(self):
+        self.children: Dict[str, '_Node'] = {}
+        self.action: Optional[int] = None
+
+
+class Redactor:
+    def __init__(self, allow: Iterable[str] = (), deny: Iterable[str] = (), hash: Iterable[str] = (), salt: str = ''):
+        self.salt = salt
+        self._root = _Node()
+        self._allowlist = False
+        self._cache: Dict[str, Tuple[Optional[int], List[_Node], bool]] = {}
+
+        for action, paths in ((ALLOW, allow), (HASH, hash), (DENY, deny)):
+            for path in paths:
+                self._add(path, action)
+
+    def _add(self, path: str, action: int):
+        node = self._root
+        for key in path.split('.'):
+            node = node.children.setdefault(key, _Node())
+        node.action = max(node.action or 0, action)
+        if action == ALLOW:
+            self._allowlist = True
+
+    def apply(self, key: str, value: Any) -> Tuple[bool, Any]:
+        '''apply the rules to the field `key`, returning whether to keep it and its (possibly redacted) value'''
+        verdict, states, allowed = self._walk_key(key)
+        if verdict == DENY:
+            return False, None
+        elif verdict == HASH:
+            return True, self._hash(value)
+        else:
+            return self._redact(states, allowed, value)
+
+    def _walk_key(self, key: str):
+        walked = self._cache.get(key)
+        if walked is None:
+            if len(self._cache) >= MAX_CACHED_KEYS:
+                self._cache.clear()
+            walked = self._cache[key] = self._walk(key.split('.'))
+        return walked
+
+    def _walk(self, keys: List[str]):
+        states = [self._root]
+        allowed = False
+        for key in keys:
+            states = _step(states, key)
+            action = _action(states)
+            if action == DENY or action == HASH:
+                return action, states, allowed
+            allowed = allowed or action == ALLOW
+        return None, states, allowed
+
+    def _redact(self, states: List[_Node], allowed: bool, value: Any) -> Tuple[bool, Any]:
+        keep = allowed or not self._allowlist
+        if not any(node.children for node in states):
+            return keep, value
+
+        if isinstance(value, dict):
+            redacted: Any = {}
+            for k, v in value.items():
+                keep_child, v = self._redact_child(states, allowed, str(k), v)
+                if keep_child:
+                    redacted[k] = v
+        elif isinstance(value, (list, tuple)):
+            # list items are matched by their index, or by *
+            redacted = []
+            for i, v in enumerate(value):
+                keep_child, v = self._redact_child(states, allowed, str(i), v)
+                if keep_child:
+                    redacted.append(v)
+        else:
+            return keep, value
+
+        return keep or bool(redacted), redacted
+
+    def _redact_child(self, states: List[_Node], allowed: bool, key: str, value: Any) -> Tuple[bool, Any]:
+        child_states = _step(states, key)
+        action = _action(child_states)
+        if action == DENY:
+            return False, None
+        elif action == HASH:
+            return True, self._hash(value)
+        else:
+            return self._redact(child_states, allowed or action == ALLOW, value)
+
+    def _hash(self, value: Any) -> str:
+        if not isinstance(value, str):
+            value = json.dumps(value, sort_keys=True, default=str)
+        return hashlib.sha256((self.salt + value).encode('utf-8')).hexdigest()
+
+    def __repr__(self):
+        return "{cls}(allowlist={allowlist!r})".format(cls=self.__class__.__name__, allowlist=self._allowlist)
+
+
+def _step(states: List[_Node], key: str) -> List[_Node]:
+    following = []
+    for node in states:
+        child = node.children.get(key)
+        if child is not None:
+            following.append(child)
+        child = node.children.get(WILDCARD)
+        if child is not None:
+            following.append(child)
+    return following
+
+
+def _action(states: List[_Node]) -> Optional[int]:
+    action = None
+    for node in states:
+        if node.action and (action is None or node.action > action):
+            action = node.action
+    return action
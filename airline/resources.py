@@ -0,0 +1,89 @@
+"""
+Resource usage of an event: cpu time, peak memory growth and gc pauses.
+
+Enabled with `airline.init(resources=True)`, which adds to each event:
+
+- `meta.resources.cpu_ms`: process cpu time (all threads)
+- `meta.resources.thread_cpu_ms`: cpu time of the thread running the event
+- `meta.resources.max_rss_delta_kb`: growth in the peak resident set size
+- `meta.resources.gc_collections` and `meta.resources.gc_pause_ms`
+
+and `meta.resources.timers.<name>.cpu_ms`/`thread_cpu_ms` for each timer.
+Comparing cpu time against `duration_ms` shows whether the time went on
+computation or on waiting.
+
+GC collections are counted process wide, so concurrent events in other
+threads will see each other's collections.
+"""
+import gc
+import sys
+import time
+from typing import (
+    Any,
+    Dict,
+    NamedTuple,
+)
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on windows
+    resource = None  # type: ignore
+
+
+PREFIX = 'meta.resources.'
+
+# ru_maxrss is in kilobytes on linux, but bytes on macOS
+_RSS_SCALE = 1024 if sys.platform == 'darwin' else 1
+
+_thread_time = getattr(time, 'thread_time', time.process_time)
+
+
+class _GCStats:
+    collections = 0
+    pause = 0.0
+    _started = 0.0
+    _installed = False
+
+
+def _gc_callback(phase: str, info: Dict[str, Any]):
+    if phase == 'start':
+        _GCStats._started = time.perf_counter()
+    else:
+        _GCStats.collections += 1
+        _GCStats.pause += time.perf_counter() - _GCStats._started
+
+
+def install_gc_callback():
+    '''start counting gc collections, if that hasn't already been done'''
+    if not _GCStats._installed:
+        gc.callbacks.append(_gc_callback)
+        _GCStats._installed = True
+
+
+class Usage(NamedTuple):
+    cpu: float
+    thread_cpu: float
+    max_rss: int
+    gc_collections: int
+    gc_pause: float
+
+    @classmethod
+    def now(cls) -> 'Usage':
+        if resource is not None:
+            max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // _RSS_SCALE
+        else:
+            max_rss = 0
+        return cls(time.process_time(), _thread_time(), max_rss, _GCStats.collections, _GCStats.pause)
+
+    def fields_since(self, start: 'Usage') -> Dict[str, Any]:
+        return {
+            PREFIX + 'cpu_ms': round((self.cpu - start.cpu) * 1000, 3),
+            PREFIX + 'thread_cpu_ms': round((self.thread_cpu - start.thread_cpu) * 1000, 3),
+            PREFIX + 'max_rss_delta_kb': self.max_rss - start.max_rss,
+            PREFIX + 'gc_collections': self.gc_collections - start.gc_collections,
+            PREFIX + 'gc_pause_ms': round((self.gc_pause - start.gc_pause) * 1000, 3),
+        }
+
+
+def cpu_times():
+    return time.process_time(), _thread_time()
@@ -1,17 +1,54 @@
+from contextlib import contextmanager
 import threading
 
+try:
+    import contextvars
+except ImportError:  # python 3.6
+    contextvars = None  # type: ignore
+
 from .client import Client
+from .event import Event
+
+
+class _ThreadLocalVar(threading.local):
+    '''the part of the ContextVar interface we need, for when it isn't available'''
+    value = None
+
+    def get(self):
+        return self.value
+
+    def set(self, value):
+        self.value = value
 
 
 class ThreadLocalClient(Client):
+    '''A client which keeps a separate current event for each thread.
+
+    Where contextvars is available (python 3.7+), the current event is also
+    kept separately for each asyncio task.
+    '''
+
     def __init__(self, *args, **kwargs):
+        if contextvars is not None:
+            self._current = contextvars.ContextVar('airline_event', default=None)
+        else:
+            self._current = _ThreadLocalVar()
         super(ThreadLocalClient, self).__init__(*args, **kwargs)
-        self._state = threading.local()
 
     @property
     def _event(self):
-        return getattr(self._state, 'event', None)
+        return self._current.get()
 
     @_event.setter
     def _event(self, new_event):
-        self._state.event = new_event
+        self._current.set(new_event)
+
+    @contextmanager
+    def bound(self, event: Event):
+        '''Bind the current thread to a shard of `event` for the duration of the block.
+
+        Fields recorded in the block go to this thread's shard, and are merged
+        into `event` when it is done.
+        '''
+        with self.using(event.shard()):
+            yield
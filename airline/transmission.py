@@ -0,0 +1,249 @@
+"""
+Send events to an events API over HTTP, instead of printing them.
+
+```
+airline.init(dataset='my_app', transmission=HTTPTransmission('https://events.example.com/1/batch/my_app'))
+```
+
+Events are collected into batches by a background thread, and each batch is
+gzipped and POSTed as a JSON array by a small pool of workers.  Each worker
+keeps its own keep-alive connection.  Failed batches are retried with
+exponential backoff and jitter, and at most `max_in_flight` batches are
+outstanding at once; once the pending queue is full new events are dropped
+rather than blocking the caller.
+
+Call `flush()` (e.g. at the end of each Lambda invocation, before the
+process may be frozen) to wait for everything queued so far to be sent.
+"""
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+import gzip
+import http.client
+import logging
+import queue
+import random
+import threading
+import time
+from typing import (
+    Dict,
+    List,
+    Optional,
+    Set,
+)
+from urllib.parse import urlsplit
+
+
+log = logging.getLogger('airline')
+
+_STOP = object()
+
+
+class _Flush:
+    '''marks the point in the queue a flush() is waiting for'''
+
+    def __init__(self):
+        self.done = threading.Event()
+
+
+class TransmissionError(Exception):
+    pass
+
+
+class BatchRejected(TransmissionError):
+    '''the events API refused the batch, so there's no point retrying it'''
+
+
+class HTTPTransmission:
+    def __init__(self, url: str, headers: Optional[Dict[str, str]] = None, batch_size: int = 100,
+                 batch_timeout: float = 0.1, max_workers: int = 4, max_in_flight: int = 8,
+                 max_pending: int = 10000, retries: int = 3, timeout: float = 10.0,
+                 backoff_base: float = 0.1, backoff_cap: float = 5.0):
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https'):
+            raise ValueError("Unsupported url scheme: url=%s" % (url,))
+
+        self.url = url
+        self._scheme = parts.scheme
+        self._netloc = parts.netloc
+        self._path = parts.path or '/'
+        if parts.query:
+            self._path += '?' + parts.query
+
+        self.headers = {
+            'Content-Type': 'application/json',
+            'Content-Encoding': 'gzip',
+            **(headers or {}),
+        }
+        self.batch_size = batch_size
+        self.batch_timeout = batch_timeout
+        self.retries = retries
+        self.timeout = timeout
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+
+        self._pending: queue.Queue = queue.Queue(maxsize=max_pending)
+        self._in_flight = threading.BoundedSemaphore(max_in_flight)
+        self._pool = ThreadPoolExecutor(max_workers=max_workers)
+        self._local = threading.local()
+        self._connections: List[http.client.HTTPConnection] = []
+        self._outstanding: Set[Future] = set()
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            'events_sent': 0,
+            'events_dropped': 0,
+            'batches_sent': 0,
+            'batches_failed': 0,
+            'retries': 0,
+            'batch_latency_ms_total': 0.0,
+            'batch_latency_ms_max': 0.0,
+        }
+        self._closed = False
+        self._batcher = threading.Thread(target=self._run, name='airline-transmission', daemon=True)
+        self._batcher.start()
+
+    def send(self, payload: str):
+        '''queue a serialized event to be sent in the next batch'''
+        if self._closed:
+            log.warning("Transmission is closed, dropping event")
+            self._count('events_dropped')
+            return
+
+        try:
+            self._pending.put_nowait(payload)
+        except queue.Full:
+            self._count('events_dropped')
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        '''wait until everything queued so far has been sent (or has failed)
+
+        Returns False if that didn't happen within `timeout` seconds.
+        '''
+        if self._closed:
+            return True
+        marker = _Flush()
+        self._pending.put(marker)
+        return marker.done.wait(timeout)
+
+    def close(self):
+        '''send anything pending, and wait for all batches to complete'''
+        if self._closed:
+            return
+        self._closed = True
+        self._pending.put(_STOP)
+        self._batcher.join()
+        self._pool.shutdown(wait=True)
+        for conn in self._connections:
+            conn.close()
+
+    def stats(self) -> Dict[str, float]:
+        with self._stats_lock:
+            return dict(self._stats)
+
+    def _count(self, name: str, value=1):
+        with self._stats_lock:
+            self._stats[name] += value
+
+    def _run(self):
+        control = None
+        while control is not _STOP:
+            batch, control = self._next_batch()
+            if batch:
+                self._dispatch(batch)
+            if isinstance(control, _Flush):
+                wait(list(self._outstanding))
+                control.done.set()
+
+    def _next_batch(self):
+        first = self._pending.get()
+        if first is _STOP or isinstance(first, _Flush):
+            return [], first
+
+        batch = [first]
+        deadline = time.monotonic() + self.batch_timeout
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._pending.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is _STOP or isinstance(item, _Flush):
+                return batch, item
+            batch.append(item)
+
+        return batch, None
+
+    def _dispatch(self, batch: List[str]):
+        self._in_flight.acquire()
+        future = self._pool.submit(self._send_batch, batch)
+        self._outstanding.add(future)
+        future.add_done_callback(self._batch_done)
+
+    def _batch_done(self, future: Future):
+        self._outstanding.discard(future)
+        self._in_flight.release()
+
+    def _send_batch(self, batch: List[str]):
+        body = gzip.compress(("[" + ",".join(batch) + "]").encode('utf-8'))
+        start = time.perf_counter()
+        attempt = 0
+        while True:
+            try:
+                self._post(body)
+                break
+            except Exception as e:
+                attempt += 1
+                if isinstance(e, BatchRejected) or attempt > self.retries:
+                    self._count('batches_failed')
+                    self._count('events_dropped', len(batch))
+                    log.warning("Failed to send batch: events=%d attempts=%d error=%r", len(batch), attempt, e)
+                    return
+                self._count('retries')
+                self._sleep(attempt)
+
+        latency = (time.perf_counter() - start) * 1000
+        with self._stats_lock:
+            self._stats['batches_sent'] += 1
+            self._stats['events_sent'] += len(batch)
+            self._stats['batch_latency_ms_total'] += latency
+            self._stats['batch_latency_ms_max'] = max(self._stats['batch_latency_ms_max'], latency)
+        log.debug("Sent batch: events=%d latency_ms=%.3f attempts=%d", len(batch), latency, attempt + 1)
+
+    def _post(self, body: bytes):
+        conn = self._connection()
+        try:
+            conn.request('POST', self._path, body=body, headers=self.headers)
+            resp = conn.getresponse()
+            resp.read()
+        except Exception:
+            self._drop_connection()
+            raise
+
+        if resp.status == 429 or resp.status >= 500:
+            raise TransmissionError("Retryable response: status=%d" % (resp.status,))
+        elif resp.status >= 400:
+            raise BatchRejected("Batch rejected: status=%d" % (resp.status,))
+
+    def _connection(self) -> http.client.HTTPConnection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            if self._scheme == 'https':
+                conn = http.client.HTTPSConnection(self._netloc, timeout=self.timeout)
+            else:
+                conn = http.client.HTTPConnection(self._netloc, timeout=self.timeout)
+            self._local.conn = conn
+            self._connections.append(conn)
+        return conn
+
+    def _drop_connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._connections.remove(conn)
+            self._local.conn = None
+
+    def _sleep(self, attempt: int):
+        time.sleep(random.uniform(0, min(self.backoff_cap, self.backoff_base * 2**attempt)))
+
+    def __repr__(self):
+        return "{cls}(url={url!r})".format(cls=self.__class__.__name__, url=self.url)
@@ -0,0 +1,42 @@
+import asyncio
+
+import pytest
+
+import airline
+
+
+@pytest.fixture
+def client(mocker):
+    airline.init(dataset='test')
+    client = airline._ARL
+    mocker.patch.object(client, 'send')
+    yield client
+    airline._ARL = None
+
+
+@pytest.fixture
+def sent(client):
+    '''the fields of every event sent by the client, in order'''
+    def sent():
+        return [call[0][0].fields() for call in client.send.call_args_list]
+    return sent
+
+
+@pytest.fixture
+def sent_fields(client):
+    '''the fields of the last event sent by the client'''
+    def sent_fields():
+        return client.send.call_args[0][0].fields()
+    return sent_fields
+
+
+@pytest.fixture
+def run():
+    '''run a coroutine to completion on a fresh event loop'''
+    def run(coro):
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(coro)
+        finally:
+            loop.close()
+    return run
@@ -0,0 +1,130 @@
+import asyncio
+import time
+
+import airline
+import airline.aio
+
+
+def test_events_record_loop_lag(client, sent_fields, run):
+    @airline.evented()
+    async def blocking():
+        time.sleep(0.05)
+        await asyncio.sleep(0.05)
+
+    async def main():
+        monitor = airline.aio.install(interval=0.01)
+        await blocking()
+        monitor.stop()
+        return monitor
+
+    monitor = run(main())
+
+    fields = sent_fields()
+    assert fields['asyncio.loop_lag.samples'] >= 1
+    assert fields['asyncio.loop_lag.max_ms'] >= 30
+    assert fields['asyncio.loop_lag.avg_ms'] <= fields['asyncio.loop_lag.max_ms']
+    assert monitor.lag.samples >= fields['asyncio.loop_lag.samples']
+
+
+def test_events_count_tasks(client, sent_fields, run):
+    @airline.evented()
+    async def fan_out():
+        tasks = [asyncio.ensure_future(asyncio.sleep(0)) for _ in range(3)]
+        await asyncio.gather(*tasks)
+        cancelled = asyncio.ensure_future(asyncio.sleep(10))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        await asyncio.wait([cancelled])
+        await asyncio.sleep(0)
+
+    async def main():
+        monitor = airline.aio.install()
+        await fan_out()
+        monitor.stop()
+
+    run(main())
+
+    fields = sent_fields()
+    assert fields['rollup.asyncio.tasks_created'] == 4
+    assert fields['rollup.asyncio.tasks_completed'] == 3
+    assert fields['rollup.asyncio.tasks_cancelled'] == 1
+
+
+def test_stop_restores_the_task_factory(run):
+    async def main():
+        loop = asyncio.get_event_loop()
+        monitor = airline.aio.install(loop)
+        assert loop.get_task_factory() is not None
+        monitor.stop()
+        assert loop.get_task_factory() is None
+
+    run(main())
+
+
+def test_async_timer_times_awaits(client, sent_fields, run):
+    @airline.evented()
+    async def work():
+        async with airline.aio.timer('sleep'):
+            await asyncio.sleep(0.02)
+
+    run(work())
+
+    assert sent_fields()['timers.sleep_ms'] >= 20
+
+
+def test_async_timer_works_with_plain_with(client, sent_fields):
+    with client.evented():
+        with airline.aio.timer('block'):
+            pass
+
+    assert 'timers.block_ms' in sent_fields()
+
+
+def test_async_timer_works_without_init(run):
+    async def work():
+        async with airline.aio.timer('sleep'):
+            return 1
+
+    assert run(work()) == 1
+
+
+def test_overlapping_events_all_record_loop_lag(client, sent, run):
+    @airline.evented()
+    async def waiting(name):
+        airline.add_context_field('name', name)
+        await asyncio.sleep(0.1)
+
+    @airline.evented()
+    async def blocking():
+        airline.add_context_field('name', 'blocking')
+        time.sleep(0.05)
+
+    async def main():
+        monitor = airline.aio.install(interval=0.01)
+        await asyncio.gather(waiting('a'), waiting('b'), blocking())
+        monitor.stop()
+
+    run(main())
+
+    events = {f['name']: f for f in sent()}
+    assert events['a']['asyncio.loop_lag.max_ms'] >= 30
+    assert events['b']['asyncio.loop_lag.max_ms'] >= 30
+
+
+def test_tasks_finishing_after_the_event_are_not_counted(client, sent_fields, run):
+    @airline.evented()
+    async def fire_and_forget():
+        return asyncio.ensure_future(asyncio.sleep(0.01))
+
+    async def main():
+        monitor = airline.aio.install()
+        task = await fire_and_forget()
+        fields = sent_fields()
+        await task
+        monitor.stop()
+        return fields
+
+    fields = run(main())
+
+    assert fields['rollup.asyncio.tasks_created'] == 1
+    assert 'rollup.asyncio.tasks_completed' not in sent_fields()
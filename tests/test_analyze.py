@@ -0,0 +1,120 @@
+import gzip
+import json
+
+import pytest
+
+import airline.analyze as an
+from airline.client import dots_to_deep
+from airline.event import Event
+
+
+def event_line(status, duration, **timers):
+    data = {'status': status, 'duration_ms': duration, 'app': {'function_name': 'fn'}}
+    if timers:
+        data['timers'] = timers
+    return json.dumps({'time': '2020-01-01T00:00:00Z', 'dataset': 'test', 'data': data}) + '\n\n'
+
+
+@pytest.fixture
+def log_file(tmp_path):
+    path = tmp_path / 'events.log'
+    lines = [event_line('SUCCESS', float(i), db_ms=1.0) for i in range(1, 101)]
+    lines += [event_line('ERROR', 500.0), 'not json\n']
+    path.write_text(''.join(lines))
+    return path
+
+
+def test_summary_quantiles_are_within_accuracy():
+    summary = an.Summary()
+    for i in range(1, 1001):
+        summary.add(float(i))
+
+    assert summary.count == 1000
+    assert summary.sum == 500500
+    assert summary.quantile(0.5) == pytest.approx(500, rel=0.02)
+    assert summary.quantile(0.99) == pytest.approx(990, rel=0.02)
+
+
+def test_summary_merge_matches_single_summary():
+    whole, left, right = an.Summary(), an.Summary(), an.Summary()
+    for i in range(200):
+        whole.add(i)
+        (left if i % 2 else right).add(i)
+    left.merge(right)
+
+    assert left.count == whole.count
+    assert left.quantile(0.9) == whole.quantile(0.9)
+
+
+def test_analyze_groups_by_status(log_file):
+    agg = an.analyze([str(log_file)], group_by=['status'], jobs=1)
+
+    assert agg.events == 101
+    assert agg.skipped == 1
+    rows = {(r['status'], r['metric']): r for r in agg.rows()}
+    assert rows[('SUCCESS', 'duration_ms')]['count'] == 100
+    assert rows[('SUCCESS', 'duration_ms')]['sum'] == 5050
+    assert rows[('SUCCESS', 'timers.db_ms')]['p50'] == pytest.approx(1.0)
+    assert rows[('ERROR', 'duration_ms')]['p99'] == pytest.approx(500.0)
+
+
+def test_analyze_small_chunks_match(log_file):
+    whole = an.analyze([str(log_file)], jobs=1).rows()
+    chunked = an.analyze([str(log_file)], jobs=1, chunk_bytes=100).rows()
+
+    assert chunked == whole
+
+
+def test_analyze_reads_gzip_in_processes(log_file, tmp_path):
+    gz = tmp_path / 'events.log.gz'
+    with gzip.open(str(gz), 'wb') as f:
+        f.write(log_file.read_bytes())
+
+    agg = an.analyze([str(gz)], group_by=['app.function_name'], jobs=2, chunk_lines=10)
+
+    assert agg.events == 101
+    assert [r['app.function_name'] for r in agg.rows()] == ['fn', 'fn']
+
+
+def test_main_prints_json(log_file, capsys):
+    an.main(['--json', '-j', '1', '-q', '0.9', str(log_file)])
+
+    out = json.loads(capsys.readouterr().out)
+    assert out['events'] == 101
+    assert 'p90' in out['rows'][0]
+
+
+def test_main_prints_table(log_file, capsys):
+    an.main(['-j', '1', str(log_file)])
+
+    header, *rows = capsys.readouterr().out.strip().splitlines()
+    assert header.split() == ['status', 'metric', 'count', 'sum', 'p50', 'p99']
+    assert len(rows) == 3
+
+
+def test_analyze_groups_by_lists_and_dicts(tmp_path):
+    path = tmp_path / 'events.log'
+    lines = [
+        json.dumps({'data': {'tags': ['a'], 'duration_ms': 1.0}}),
+        json.dumps({'data': {'tags': ['a'], 'duration_ms': 2.0}}),
+        json.dumps({'data': {'tags': {'b': 1}, 'duration_ms': 3.0}}),
+    ]
+    path.write_text('\n'.join(lines) + '\n')
+
+    rows = an.analyze([str(path)], group_by=['tags'], jobs=1).rows()
+
+    assert [(r['tags'], r['count']) for r in rows] == [('["a"]', 2), ('{"b": 1}', 1)]
+
+
+def test_analyze_reads_dotted_timer_names(tmp_path):
+    event = Event()
+    with event.add_timer_field('db.query'):
+        pass
+    with event.add_timer_field('http'):
+        pass
+    path = tmp_path / 'events.log'
+    path.write_text(json.dumps({'data': dots_to_deep(event.fields())}) + '\n')
+
+    metrics = [r['metric'] for r in an.analyze([str(path)], group_by=['status'], jobs=1).rows()]
+
+    assert metrics == ['timers.db.query_ms', 'timers.http_ms']
@@ -0,0 +1,93 @@
+import json
+import types
+
+import pytest
+
+import airline
+import airline.awslambda
+
+
+CONTEXT = types.SimpleNamespace(function_name='fn', function_version='1', aws_request_id='req-1')
+
+
+def sqs_event(n):
+    return {'Records': [{'messageId': f'm{i}', 'eventSource': 'aws:sqs', 'body': str(i)} for i in range(n)]}
+
+
+def emitted(client, capsys):
+    '''the children written out by send_batch, then the parent event'''
+    children = [json.loads(line)['data'] for line in capsys.readouterr().err.splitlines() if line]
+    parent = json.loads(client._serialize(client.send.call_args[0][0]))['data']
+    return children + [parent]
+
+
+def test_batch_wrapper_emits_an_event_per_record_and_a_summary(client, capsys):
+    @airline.awslambda.batch_airline_wrapper
+    def handler(record, context):
+        airline.add_context_field('body', record['body'])
+
+    handler(sqs_event(3), CONTEXT)
+
+    *children, parent = emitted(client, capsys)
+    assert len(children) == 3
+    for i, child in enumerate(children):
+        assert child['batch'] == {'id': 'req-1', 'index': i}
+        assert child['body'] == str(i)
+        assert child['status'] == 'SUCCESS'
+        assert child['app']['function_name'] == 'fn'
+        assert child['app']['record_id'] == f'm{i}'
+
+    assert parent['batch']['size'] == 3
+    assert parent['batch']['status'] == {'SUCCESS': 3}
+    assert set(parent['batch']['duration_ms']) == {'p50', 'p90', 'p99', 'max'}
+    assert 'body' not in parent
+
+
+def test_batch_wrapper_writes_children_in_one_write(client, mocker):
+    send_batch = mocker.patch.object(client, 'send_batch')
+
+    @airline.awslambda.batch_airline_wrapper
+    def handler(record, context):
+        pass
+
+    handler(sqs_event(5), CONTEXT)
+
+    send_batch.assert_called_once()
+    assert len(send_batch.call_args[0][0]) == 5
+
+
+def test_batch_wrapper_reports_partial_failures(client, capsys):
+    @airline.awslambda.batch_airline_wrapper(partial_failures=True)
+    def handler(record, context):
+        if record['body'] == '1':
+            raise RuntimeError('bad record')
+
+    resp = handler(sqs_event(3), CONTEXT)
+
+    assert resp == {'batchItemFailures': [{'itemIdentifier': 'm1'}]}
+    *children, parent = emitted(client, capsys)
+    assert children[1]['status'] == 'ERROR'
+    assert children[1]['exception']['message'] == 'bad record'
+    assert parent['batch']['status'] == {'SUCCESS': 2, 'ERROR': 1}
+    assert parent['batch']['failures'] == 1
+
+
+def test_batch_wrapper_fails_the_batch_by_default(client, capsys):
+    @airline.awslambda.batch_airline_wrapper
+    def handler(record, context):
+        if record['body'] == '1':
+            raise RuntimeError('bad record')
+
+    with pytest.raises(RuntimeError):
+        handler(sqs_event(3), CONTEXT)
+
+    *children, parent = emitted(client, capsys)
+    assert len(children) == 2
+    assert parent['status'] == 'ERROR'
+
+
+def test_quantile_is_nearest_rank():
+    values = list(range(1, 101))
+    assert airline.awslambda._quantile(values, 0.5) == 50
+    assert airline.awslambda._quantile(values, 0.99) == 99
+    assert airline.awslambda._quantile([7], 0.5) == 7
@@ -0,0 +1,214 @@
+import asyncio
+
+import pytest
+
+import airline
+
+
+def test_evented_coroutine_covers_the_awaited_call(client, sent_fields, run):
+    @airline.evented(foo='bar')
+    async def work():
+        await asyncio.sleep(0)
+        airline.add_context_field('inside', True)
+        return 1
+
+    assert run(work()) == 1
+    fields = sent_fields()
+    assert fields['inside'] is True
+    assert fields['foo'] == 'bar'
+
+
+def test_evented_generator_covers_the_iteration(client, sent_fields):
+    @airline.evented()
+    def work():
+        for i in range(3):
+            airline.add_rollup_field('items', 1)
+            yield i
+
+    assert list(work()) == [0, 1, 2]
+    assert sent_fields()['rollup.items'] == 3
+
+
+def test_evented_generator_records_errors(client, sent_fields):
+    @airline.evented()
+    def work():
+        yield 1
+        raise RuntimeError('example')
+
+    with pytest.raises(RuntimeError):
+        list(work())
+    assert sent_fields()['status'] == 'ERROR'
+
+
+def test_evented_async_generator_covers_the_iteration(client, sent_fields, run):
+    @airline.evented()
+    async def work():
+        for i in range(3):
+            airline.add_rollup_field('items', 1)
+            yield i
+
+    async def consume():
+        return [i async for i in work()]
+
+    assert run(consume()) == [0, 1, 2]
+    assert sent_fields()['rollup.items'] == 3
+
+
+def test_timed_coroutine(client, sent_fields, run):
+    @airline.timed()
+    async def work():
+        await asyncio.sleep(0.01)
+
+    with client.evented():
+        run(work())
+
+    fields = sent_fields()
+    assert fields['rollup.work_calls'] == 1
+    assert fields['timers.work_duration_ms'] >= 10
+
+
+def test_timed_generator_counts_items(client, sent_fields):
+    @airline.timed()
+    def work():
+        yield from range(5)
+
+    with client.evented():
+        assert list(work()) == [0, 1, 2, 3, 4]
+
+    fields = sent_fields()
+    assert fields['rollup.work_calls'] == 1
+    assert fields['rollup.work_items'] == 5
+    assert 'timers.work_duration_ms' in fields
+    assert 'timers.work_first_item_ms' in fields
+
+
+def test_timed_generator_excludes_consumer_time(client, mocker, sent_fields):
+    # event start, first step (with the first item timer), final step, event end
+    mocker.patch('time.perf_counter', side_effect=[0, 1, 1, 2, 2, 5, 6, 10])
+
+    @airline.timed()
+    def work():
+        yield 1
+
+    with client.evented():
+        for _ in work():
+            pass
+
+    fields = sent_fields()
+    assert fields['timers.work_duration_ms'] == 2000.0
+    assert fields['timers.work_first_item_ms'] == 1000.0
+
+
+def test_timed_generator_forwards_send_and_return(client):
+    @airline.timed()
+    def work():
+        received = yield 1
+        yield received
+        return 'done'
+
+    with client.evented():
+        gen = work()
+        assert next(gen) == 1
+        assert gen.send('x') == 'x'
+        with pytest.raises(StopIteration) as stop:
+            next(gen)
+        assert stop.value.value == 'done'
+
+
+def test_timed_async_generator_counts_items(client, sent_fields, run):
+    @airline.timed()
+    async def work():
+        for i in range(3):
+            yield i
+
+    async def consume():
+        return [i async for i in work()]
+
+    with client.evented():
+        assert run(consume()) == [0, 1, 2]
+
+    fields = sent_fields()
+    assert fields['rollup.work_items'] == 3
+    assert 'timers.work_first_item_ms' in fields
+
+
+def test_stacked_decorators_keep_generators(client, sent_fields):
+    @airline.evented()
+    @airline.timed()
+    def work():
+        yield from range(2)
+
+    assert list(work()) == [0, 1]
+    assert sent_fields()['rollup.work_items'] == 2
+
+
+def test_decorators_work_without_init(run):
+    @airline.timed()
+    def gen():
+        yield 1
+
+    @airline.evented()
+    async def coro():
+        return 2
+
+    assert list(gen()) == [1]
+    assert run(coro()) == 2
+
+
+def test_concurrent_evented_coroutines_get_their_own_events(client, sent, run):
+    @airline.evented()
+    async def work(i):
+        airline.add_context_field('i', i)
+        await asyncio.sleep(0)
+        airline.add_rollup_field('steps', i)
+        await asyncio.sleep(0)
+        return i
+
+    async def main():
+        return await asyncio.gather(work(1), work(2))
+
+    assert run(main()) == [1, 2]
+    events = sorted(sent(), key=lambda f: f['i'])
+    assert [(f['i'], f['rollup.steps']) for f in events] == [(1, 1), (2, 2)]
+
+
+def test_interleaved_evented_generators_get_their_own_events(client, sent):
+    @airline.evented()
+    def numbers(name):
+        for i in range(3):
+            airline.add_context_field('name', name)
+            airline.add_rollup_field('items', 1)
+            yield i
+
+    assert list(zip(numbers('a'), numbers('b'))) == [(0, 0), (1, 1), (2, 2)]
+    events = sorted(sent(), key=lambda f: f['name'])
+    assert [(f['name'], f['rollup.items']) for f in events] == [('a', 3), ('b', 3)]
+
+
+def test_consumer_fields_stay_off_a_paused_generators_event(client, sent):
+    @airline.evented()
+    def numbers():
+        yield from range(2)
+
+    with client.evented():
+        for _ in numbers():
+            airline.add_rollup_field('consumed', 1)
+
+    generator_event, consumer_event = sent()
+    assert 'rollup.consumed' not in generator_event
+    assert consumer_event['rollup.consumed'] == 2
+
+
+def test_nested_evented_restores_the_outer_event(client, sent):
+    @airline.evented()
+    def inner():
+        airline.add_context_field('inner', True)
+
+    with client.evented():
+        inner()
+        airline.add_context_field('outer', True)
+
+    inner_event, outer_event = sent()
+    assert inner_event['inner'] is True
+    assert 'inner' not in outer_event
+    assert outer_event['outer'] is True
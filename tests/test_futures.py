@@ -0,0 +1,105 @@
+import sys
+import threading
+
+import airline
+import airline.futures
+
+
+def test_workers_record_to_the_parent_event(client):
+    def work(i):
+        airline.add_rollup_field('items', 1)
+        airline.add_context_field('worker.%d' % i, threading.get_ident())
+        with airline.timer('work'):
+            pass
+
+    with client.evented():
+        with airline.futures.ThreadPoolExecutor(max_workers=4) as pool:
+            list(pool.map(work, range(20)))
+
+    event = client.send.call_args[0][0]
+    fields = event.fields()
+    assert fields['rollup.items'] == 20
+    assert 'timers.work_ms' in fields
+    assert all('worker.%d' % i in fields for i in range(20))
+
+
+def test_workers_use_a_shard_per_thread(client):
+    barrier = threading.Barrier(2)
+
+    def work():
+        barrier.wait()
+        return id(client._event)
+
+    with client.evented():
+        event = client._event
+        with airline.futures.ThreadPoolExecutor(max_workers=2) as pool:
+            ids = {f.result() for f in [pool.submit(work), pool.submit(work)]}
+        assert len(event._shards) == 2
+        assert ids == {id(s) for s in event._shards.values()}
+
+
+def test_worker_is_unbound_after_the_task(client):
+    with client.evented():
+        with airline.futures.ThreadPoolExecutor(max_workers=1) as pool:
+            pool.submit(lambda: None).result()
+            assert pool.submit(lambda: client._event).result() is not None
+        assert client._event is not None
+
+    with airline.futures.ThreadPoolExecutor(max_workers=1) as pool:
+        assert pool.submit(lambda: client._event).result() is None
+
+
+def test_executor_works_without_init():
+    with airline.futures.ThreadPoolExecutor(max_workers=1) as pool:
+        assert pool.submit(lambda x: x + 1, 1).result() == 2
+
+
+def test_evented_tasks_send_their_own_events(client, sent):
+    @airline.evented()
+    def item(i):
+        airline.add_context_field('item', i)
+
+    with client.evented():
+        airline.add_context_field('parent', True)
+        with airline.futures.ThreadPoolExecutor(max_workers=2) as pool:
+            list(pool.map(item, range(4)))
+
+    *items, parent = sent()
+    assert sorted(f['item'] for f in items) == [0, 1, 2, 3]
+    assert all('parent' not in f for f in items)
+    assert parent['parent'] is True
+    assert 'item' not in parent
+
+
+def test_tasks_outliving_the_event_do_not_break_sending_it(client, sent):
+    stop = threading.Event()
+    started = threading.Barrier(5)
+
+    def work(i):
+        # new names each time, so the shard's dicts keep growing while the
+        # (long) merge of the ones recorded before the event ended runs
+        for n in range(2000):
+            airline.add_rollup_field('late.%d.%d' % (i, n), 1)
+        started.wait()
+        while not stop.is_set():
+            n += 1
+            airline.add_rollup_field('late.%d.%d' % (i, n), 1)
+
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    pool = airline.futures.ThreadPoolExecutor(max_workers=4)
+    try:
+        for _ in range(20):
+            with client.evented():
+                futures = [pool.submit(work, i) for i in range(4)]
+                started.wait()
+            stop.set()
+            for f in futures:
+                f.result()
+            stop.clear()
+    finally:
+        stop.set()
+        pool.shutdown()
+        sys.setswitchinterval(interval)
+
+    assert len(sent()) == 20
@@ -0,0 +1,136 @@
+import threading
+import time
+
+import pytest
+
+import airline
+import airline.awsbatch
+from airline.heartbeat import Heartbeat
+
+
+def test_beat_sends_cumulative_values_and_deltas(client, sent):
+    client.start()
+    event = client._event
+    event.add_field('job', 'x')
+    event.add_rollup_field('rows', 5)
+    beat = Heartbeat(client, event, 60)
+
+    beat.beat()
+    event.add_rollup_field('rows', 3)
+    beat.beat()
+
+    first, second = sent()
+    assert first['job'] == 'x'
+    assert first['heartbeat.sequence'] == 1
+    assert first['rollup.rows'] == 5
+    assert first['heartbeat.delta.rollup.rows'] == 5
+    assert second['heartbeat.sequence'] == 2
+    assert second['rollup.rows'] == 8
+    assert second['heartbeat.delta.rollup.rows'] == 3
+    assert second['heartbeat.elapsed_ms'] >= first['heartbeat.elapsed_ms']
+
+
+def test_snapshots_do_not_change_the_event(client, sent):
+    client.start()
+    event = client._event
+    with event.add_timer_field('work'):
+        pass
+
+    Heartbeat(client, event, 60).beat()
+
+    assert 'heartbeat.sequence' not in event.fields()
+    assert sent()[0]['heartbeat.delta.timers.work_ms'] == event.fields()['timers.work_ms']
+
+
+def test_snapshots_include_thread_shards(client, sent):
+    client.start()
+    event = client._event
+
+    def work():
+        with client.bound(event):
+            airline.add_rollup_field('rows', 2)
+
+    thread = threading.Thread(target=work)
+    thread.start()
+    thread.join()
+
+    Heartbeat(client, event, 60).beat()
+
+    assert sent()[0]['rollup.rows'] == 2
+    assert event._shards
+
+
+def test_batch_wrapper_heartbeats_while_running(client, sent):
+    seen = threading.Event()
+
+    def wait_for_beat(*args, **kwargs):
+        if 'heartbeat.sequence' in args[0].fields():
+            seen.set()
+
+    client.send.side_effect = wait_for_beat
+
+    @airline.awsbatch.airline_wrapper(add_role_info=False, heartbeat=0.01)
+    def job():
+        airline.add_rollup_field('rows', 1)
+        assert seen.wait(5)
+
+    job()
+
+    *beats, final = sent()
+    assert beats
+    assert all('heartbeat.sequence' in b for b in beats)
+    assert 'heartbeat.sequence' not in final
+    assert final['rollup.rows'] == 1
+
+
+def test_heartbeat_survives_a_failed_beat(client, sent):
+    client.start()
+    beats = threading.Semaphore(0)
+
+    def send(event):
+        beats.release()
+        if event.fields()['heartbeat.sequence'] == 1:
+            raise RuntimeError('example')
+
+    client.send.side_effect = send
+    beat = Heartbeat(client, client._event, 0.01).start()
+    try:
+        assert beats.acquire(timeout=5)
+        assert beats.acquire(timeout=5)
+    finally:
+        beat.stop()
+
+    assert len(sent()) >= 2
+
+
+def test_elapsed_is_measured_from_the_given_start(client, sent, mocker):
+    client.start()
+    mocker.patch('time.perf_counter', return_value=15.0)
+
+    Heartbeat(client, client._event, 60, start=10.0).beat()
+
+    assert sent()[0]['heartbeat.elapsed_ms'] == 5000.0
+
+
+def test_snapshots_include_running_timers(client, sent):
+    client.start()
+    event = client._event
+    beat = Heartbeat(client, event, 60)
+
+    with event.add_timer_field('main'):
+        time.sleep(0.01)
+        beat.beat()
+        time.sleep(0.01)
+        beat.beat()
+
+    first, second = sent()
+    assert first['timers.main_ms'] >= 10
+    assert second['timers.main_ms'] >= 20
+    assert second['heartbeat.delta.timers.main_ms'] >= 10
+    assert event.fields()['timers.main_ms'] >= second['timers.main_ms']
+
+
+def test_interval_must_be_positive(client):
+    client.start()
+    with pytest.raises(ValueError):
+        Heartbeat(client, client._event, -1)
@@ -0,0 +1,64 @@
+import sys
+import threading
+import time
+
+from airline.profiler import Sampler, TopCounter
+
+
+def spin(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def test_top_counter_keeps_frequent_keys_in_bounded_space():
+    counter = TopCounter(3)
+    for i in range(100):
+        counter.add('hot')
+        counter.add('cold%d' % i)
+
+    assert len(counter._counts) == 3
+    assert counter.top(1) == [{'frame': 'hot', 'samples': 100}]
+
+
+def test_sample_counts_self_and_total():
+    sampler = Sampler(top=100)
+    sampler.sample(sys._getframe())
+
+    fields = sampler.fields()
+    assert fields['profile.samples'] == 1
+    [top_self] = fields['profile.self']
+    assert 'test_sample_counts_self_and_total' in top_self['frame']
+    assert any('test_sample_counts_self_and_total' in f['frame'] for f in fields['profile.total'])
+
+
+def test_profiled_event_has_hot_functions(client, sent_fields):
+    client.profile_interval = 0.001
+    with client.evented(profile=True):
+        spin(0.1)
+
+    fields = sent_fields()
+    assert fields['profile.samples'] > 0
+    assert 'spin' in fields['profile.self'][0]['frame']
+    assert fields['profile.overhead_ms'] >= 0
+
+
+def test_profiler_is_off_by_default(client, sent_fields):
+    with client.evented():
+        pass
+
+    assert not any(k.startswith('profile.') for k in sent_fields())
+    assert not any(t.name == 'airline-profiler' for t in threading.enumerate())
+
+
+def test_profile_rate_picks_events(client, mocker, sent_fields):
+    client.profile_rate = 0.5
+    mocker.patch('random.random', side_effect=[0.4, 0.6])
+
+    with client.evented():
+        pass
+    assert 'profile.samples' in sent_fields()
+
+    with client.evented():
+        pass
+    assert 'profile.samples' not in sent_fields()
@@ -0,0 +1,143 @@
+import hashlib
+
+import pytest
+
+from airline.client import dots_to_deep
+from airline.redact import Redactor
+
+
+def sha(value):
+    return hashlib.sha256(value.encode('utf-8')).hexdigest()
+
+
+@pytest.fixture
+def fields():
+    return {
+        'status': 'SUCCESS',
+        'duration_ms': 1.0,
+        'app.function_name': 'fn',
+        'app.event': {
+            'headers': {'Authorization': 'secret', 'Host': 'example.com'},
+            'users': {'a': {'email': 'a@example.com', 'id': 1}, 'b': {'email': 'b@example.com', 'id': 2}},
+        },
+    }
+
+
+def test_no_rules_leaves_fields_alone(fields):
+    assert dots_to_deep(fields, Redactor()) == dots_to_deep(fields)
+
+
+def test_deny_removes_nested_values(fields):
+    data = dots_to_deep(fields, Redactor(deny=['app.event.headers.Authorization']))
+
+    assert data['app']['event']['headers'] == {'Host': 'example.com'}
+    assert fields['app.event']['headers']['Authorization'] == 'secret'
+
+
+def test_deny_removes_dotted_fields(fields):
+    data = dots_to_deep(fields, Redactor(deny=['app.event']))
+
+    assert data['app'] == {'function_name': 'fn'}
+
+
+def test_hash_with_wildcards(fields):
+    data = dots_to_deep(fields, Redactor(hash=['app.event.users.*.email']))
+
+    users = data['app']['event']['users']
+    assert users['a'] == {'email': sha('a@example.com'), 'id': 1}
+    assert users['b'] == {'email': sha('b@example.com'), 'id': 2}
+
+
+def test_hash_uses_salt():
+    redactor = Redactor(hash=['user'], salt='pepper')
+
+    assert dots_to_deep({'user': 'bob'}, redactor) == {'user': sha('pepperbob')}
+
+
+def test_allowlist_keeps_only_allowed_fields(fields):
+    data = dots_to_deep(fields, Redactor(allow=['status', 'duration_ms', 'app.event.users.*.id']))
+
+    assert data == {
+        'status': 'SUCCESS',
+        'duration_ms': 1.0,
+        'app': {'event': {'users': {'a': {'id': 1}, 'b': {'id': 2}}}},
+    }
+
+
+def test_deny_wins_over_allow(fields):
+    data = dots_to_deep(fields, Redactor(allow=['app'], deny=['app.event.headers']))
+
+    assert data['app']['function_name'] == 'fn'
+    assert 'headers' not in data['app']['event']
+
+
+def test_unredacted_subtrees_are_not_copied(fields):
+    data = dots_to_deep(fields, Redactor(deny=['app.event.headers.Authorization']))
+
+    assert data['app']['event']['users'] is fields['app.event']['users']
+
+
+@pytest.fixture
+def sqs_fields():
+    return {
+        'app.function_name': 'fn',
+        'app.event': {
+            'Records': [
+                {
+                    'messageId': '059f36b4-87a3-44ab-83d2-661975830a7d',
+                    'receiptHandle': 'AQEBwJnKyrHigUMZj6rYigCgxlaS3SLy0a...',
+                    'body': '{"email": "a@example.com"}',
+                    'attributes': {'ApproximateReceiveCount': '1', 'SenderId': 'AIDAIENQZJOLO23YVJ4VO'},
+                    'messageAttributes': {},
+                    'md5OfBody': 'e4e68fb7bd0e697a0ae8f1bb342846b3',
+                    'eventSource': 'aws:sqs',
+                    'eventSourceARN': 'arn:aws:sqs:us-east-2:123456789012:my-queue',
+                    'awsRegion': 'us-east-2',
+                },
+                {
+                    'messageId': '2e1424d4-f796-459a-8184-9c92662be6da',
+                    'receiptHandle': 'AQEBzWwaftRI0KuVm4tP+/7q1rGgNqicHq...',
+                    'body': '{"email": "b@example.com"}',
+                    'attributes': {'ApproximateReceiveCount': '1', 'SenderId': 'AIDAIENQZJOLO23YVJ4VO'},
+                    'messageAttributes': {},
+                    'md5OfBody': 'e4e68fb7bd0e697a0ae8f1bb342846b3',
+                    'eventSource': 'aws:sqs',
+                    'eventSourceARN': 'arn:aws:sqs:us-east-2:123456789012:my-queue',
+                    'awsRegion': 'us-east-2',
+                },
+            ],
+        },
+    }
+
+
+def test_deny_matches_list_items(sqs_fields):
+    data = dots_to_deep(sqs_fields, Redactor(deny=['app.event.Records.*.body']))
+
+    records = data['app']['event']['Records']
+    assert len(records) == 2
+    assert all('body' not in r for r in records)
+    assert records[0]['messageId'] == '059f36b4-87a3-44ab-83d2-661975830a7d'
+    assert 'body' in sqs_fields['app.event']['Records'][0]
+
+
+def test_hash_matches_list_items(sqs_fields):
+    data = dots_to_deep(sqs_fields, Redactor(hash=['app.event.Records.*.body']))
+
+    records = data['app']['event']['Records']
+    assert records[1]['body'] == sha('{"email": "b@example.com"}')
+
+
+def test_allowlist_matches_list_items(sqs_fields):
+    data = dots_to_deep(sqs_fields, Redactor(allow=['app.event.Records.*.messageId']))
+
+    assert data == {'app': {'event': {'Records': [
+        {'messageId': '059f36b4-87a3-44ab-83d2-661975830a7d'},
+        {'messageId': '2e1424d4-f796-459a-8184-9c92662be6da'},
+    ]}}}
+
+
+def test_list_indices_can_be_named(sqs_fields):
+    data = dots_to_deep(sqs_fields, Redactor(deny=['app.event.Records.0']))
+
+    [record] = data['app']['event']['Records']
+    assert record['messageId'] == '2e1424d4-f796-459a-8184-9c92662be6da'
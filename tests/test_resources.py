@@ -0,0 +1,63 @@
+import gc
+
+import pytest
+
+import airline.event
+from airline.resources import Usage, install_gc_callback
+
+
+@pytest.fixture
+def resources_client(client):
+    client.resources = True
+    install_gc_callback()
+    return client
+
+
+def burn():
+    return sum(i * i for i in range(200000))
+
+
+def test_evented_records_resource_usage(resources_client, sent_fields):
+    with resources_client.evented():
+        burn()
+        gc.collect()
+
+    fields = sent_fields()
+    assert fields['meta.resources.cpu_ms'] > 0
+    assert fields['meta.resources.thread_cpu_ms'] > 0
+    assert fields['meta.resources.gc_collections'] >= 1
+    assert fields['meta.resources.gc_pause_ms'] >= 0
+    assert fields['meta.resources.max_rss_delta_kb'] >= 0
+
+
+def test_resources_are_off_by_default(client, sent_fields):
+    with client.evented():
+        with client.add_timer_field('work'):
+            pass
+
+    assert not any(k.startswith('meta.resources') for k in sent_fields())
+
+
+def test_timers_record_cpu_time():
+    event = airline.event.Event(resources=True)
+
+    with event.add_timer_field('work'):
+        burn()
+
+    fields = event.fields()
+    assert 'timers.work_ms' in fields
+    assert fields['meta.resources.timers.work.cpu_ms'] > 0
+    assert fields['meta.resources.timers.work.thread_cpu_ms'] > 0
+
+
+def test_usage_fields_are_deltas():
+    start = Usage(1.0, 0.5, 100, 2, 0.25)
+    end = Usage(1.5, 0.75, 150, 5, 0.5)
+
+    assert end.fields_since(start) == {
+        'meta.resources.cpu_ms': 500.0,
+        'meta.resources.thread_cpu_ms': 250.0,
+        'meta.resources.max_rss_delta_kb': 50,
+        'meta.resources.gc_collections': 3,
+        'meta.resources.gc_pause_ms': 250.0,
+    }
@@ -0,0 +1,158 @@
+import gzip
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import json
+from socketserver import ThreadingMixIn
+import threading
+import types
+
+import pytest
+
+import airline
+import airline.awslambda
+from airline.transmission import HTTPTransmission
+
+
+class Server(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+@pytest.fixture
+def server():
+    received = []
+    responses = []
+    connections = set()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers['Content-Length']))
+            connections.add(self.client_address)
+            status = responses.pop(0) if responses else 200
+            if status == 200:
+                assert self.headers['Content-Encoding'] == 'gzip'
+                received.append(json.loads(gzip.decompress(body)))
+            self.send_response(status)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    httpd = Server(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    httpd.received = received
+    httpd.responses = responses
+    httpd.connections = connections
+    httpd.url = 'http://127.0.0.1:%d/1/batch/test' % httpd.server_address[1]
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_events_are_batched(server):
+    transmission = HTTPTransmission(server.url, batch_size=10, batch_timeout=1, max_workers=1)
+    for i in range(25):
+        transmission.send(json.dumps({'i': i}))
+    transmission.close()
+
+    assert [len(b) for b in server.received] == [10, 10, 5]
+    assert sorted(e['i'] for b in server.received for e in b) == list(range(25))
+    stats = transmission.stats()
+    assert stats['batches_sent'] == 3
+    assert stats['events_sent'] == 25
+    assert stats['batch_latency_ms_max'] > 0
+
+
+def test_connections_are_reused(server):
+    transmission = HTTPTransmission(server.url, batch_size=1, max_workers=1)
+    for i in range(5):
+        transmission.send(json.dumps({'i': i}))
+    transmission.close()
+
+    assert len(server.received) == 5
+    assert len(server.connections) == 1
+
+
+def test_failed_batches_are_retried(server):
+    server.responses.extend([500, 503])
+    transmission = HTTPTransmission(server.url, retries=3, backoff_base=0.001)
+    transmission.send('{"a": 1}')
+    transmission.close()
+
+    assert server.received == [[{'a': 1}]]
+    assert transmission.stats()['retries'] == 2
+
+
+def test_batches_are_dropped_after_retries(server):
+    server.responses.extend([500, 500, 500])
+    transmission = HTTPTransmission(server.url, retries=2, backoff_base=0.001)
+    transmission.send('{"a": 1}')
+    transmission.close()
+
+    stats = transmission.stats()
+    assert stats['batches_failed'] == 1
+    assert stats['events_dropped'] == 1
+    assert server.received == []
+
+
+def test_rejected_batches_are_not_retried(server):
+    server.responses.append(400)
+    transmission = HTTPTransmission(server.url, retries=3, backoff_base=0.001)
+    transmission.send('{"a": 1}')
+    transmission.close()
+
+    stats = transmission.stats()
+    assert stats['retries'] == 0
+    assert stats['batches_failed'] == 1
+
+
+def test_client_sends_through_the_transmission(server):
+    airline.init(dataset='test', transmission=HTTPTransmission(server.url))
+
+    @airline.evented()
+    def work():
+        airline.add_context_field('foo', 'bar')
+
+    work()
+    airline.done()
+
+    [[event]] = server.received
+    assert event['dataset'] == 'test'
+    assert event['data']['foo'] == 'bar'
+
+
+def test_flush_sends_pending_events_and_keeps_the_transmission_open(server):
+    transmission = HTTPTransmission(server.url, batch_size=100, batch_timeout=10)
+    transmission.send('{"a": 1}')
+
+    assert transmission.flush(timeout=5)
+    assert server.received == [[{'a': 1}]]
+
+    transmission.send('{"a": 2}')
+    assert transmission.flush(timeout=5)
+    assert server.received == [[{'a': 1}], [{'a': 2}]]
+    transmission.close()
+
+
+def test_send_after_close_drops_the_event(server):
+    transmission = HTTPTransmission(server.url)
+    transmission.close()
+
+    transmission.send('{"a": 1}')
+
+    assert transmission.stats()['events_dropped'] == 1
+
+
+def test_lambda_wrapper_flushes_at_the_end_of_the_invocation(server):
+    airline.init(dataset='test', transmission=HTTPTransmission(server.url, batch_timeout=10))
+    try:
+        @airline.awslambda.airline_wrapper
+        def handler(event, context):
+            return 'ok'
+
+        assert handler({}, types.SimpleNamespace()) == 'ok'
+        assert len(server.received) == 1
+    finally:
+        airline.done()